@@ -0,0 +1,238 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from columns import FixtureColumns, STATUS_CODES, NO_MINUTE, status_code
+from state import StateManager
+from storage import MemoryBackend
+from strategies import StrategyEngine, enabled_strategies, STATUS_FINISHED
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+TICK_SECONDS = 60 # One timeline entry per match minute
+SIMULATION_START = datetime(2000, 1, 1)
+STATUS_NAMES = {code: status for status, code in STATUS_CODES.items()}
+ARRAYS = ('fixture_id', 'league_id', 'fixture_index', 'tick', 'status', 'elapsed', 'home', 'away')
+META_FILE = 'meta.json'
+
+class Timelines:
+    """
+    Recorded fixture timelines in columnar form. Per fixture: fixture_id, league_id and the
+    names in `meta`; per timeline entry (sorted by tick): fixture index, tick, status code,
+    elapsed, home and away goals. Ticks are match minutes, all fixtures kicking off at tick 0.
+
+    On disk a dataset is JSON (a list) or NDJSON, optionally gzipped, of records like
+    {"fixture_id": 1, "league_id": 39, "league": "Premier League", "country": "England",
+     "home": "A", "away": "B", "timeline": [["1H", 1, 0, 0], ..., ["FT", 90, 2, 1]]}
+    with one [status, elapsed, home goals, away goals] entry per tick. `save` converts it to a
+    directory of .npy arrays, which `load` memory-maps read-only so that processes replaying
+    the same dataset share its pages instead of each parsing a copy.
+    """
+    def __init__(self, fixture_id, league_id, meta, fixture_index, tick, status, elapsed, home, away):
+        self.fixture_id = fixture_id
+        self.league_id = league_id
+        self.meta = meta # [(league, country, home team, away team)] per fixture
+        self.fixture_index = fixture_index
+        self.tick = tick
+        self.status = status
+        self.elapsed = elapsed
+        self.home = home
+        self.away = away
+
+    @classmethod
+    def from_records(cls, records):
+        records = list(records)
+        fixture_index, tick, entries = [], [], []
+        for index, record in enumerate(records):
+            for minute, (status, elapsed, home_goals, away_goals) in enumerate(record['timeline']):
+                fixture_index.append(index)
+                tick.append(minute)
+                entries.append((
+                    status_code(status), NO_MINUTE if elapsed is None else elapsed, home_goals or 0, away_goals or 0
+                ))
+        entries = np.array(entries, dtype=np.int16).reshape(-1, 4)
+        order = np.argsort(np.array(tick, dtype=np.int32), kind='stable')
+        return cls(
+            np.array([record['fixture_id'] for record in records], dtype=np.int64),
+            np.array([record.get('league_id') or 0 for record in records], dtype=np.int64),
+            [(record.get('league'), record.get('country'), record.get('home'), record.get('away')) for record in records],
+            np.array(fixture_index, dtype=np.int32)[order],
+            np.array(tick, dtype=np.int32)[order],
+            entries[order, 0].astype(np.int8),
+            entries[order, 1],
+            entries[order, 2],
+            entries[order, 3],
+        )
+
+    @classmethod
+    def load(cls, path):
+        if os.path.isdir(path):
+            return cls.load_arrays(path)
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            text = f.read()
+        if text.lstrip().startswith('['):
+            return cls.from_records(json.loads(text))
+        return cls.from_records(json.loads(line) for line in text.splitlines() if line.strip())
+
+    @classmethod
+    def load_arrays(cls, directory, mmap_mode='r'):
+        """Dataset saved by `save`, its arrays memory-mapped (mmap_mode=None reads them into memory)."""
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            meta = [tuple(entry) for entry in json.load(f)]
+        return cls(meta=meta, **arrays)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+
+    def __len__(self):
+        return len(self.fixture_id)
+
+    @property
+    def ticks(self):
+        return int(self.tick.max()) + 1 if len(self.tick) else 0
+
+    def columns(self, rows):
+        """FixtureColumns of the timeline entries `rows` (a slice or index array within one tick)."""
+        index = self.fixture_index[rows]
+        return FixtureColumns(
+            self.fixture_id[index], self.elapsed[rows], self.status[rows],
+            self.home[rows], self.away[rows], self.league_id[index]
+        )
+
+    def match(self, row):
+        """API-Football shaped fixture for timeline entry `row`, as the live=all feed returns it."""
+        index = self.fixture_index[row]
+        league, country, home_team, away_team = self.meta[index]
+        elapsed = int(self.elapsed[row])
+        return {
+            'fixture': {
+                'id': int(self.fixture_id[index]),
+                'status': {'short': STATUS_NAMES.get(int(self.status[row])), 'elapsed': None if elapsed == NO_MINUTE else elapsed},
+            },
+            'league': {'id': int(self.league_id[index]), 'name': league, 'country': country},
+            'teams': {'home': {'name': home_team}, 'away': {'name': away_team}},
+            'goals': {'home': int(self.home[row]), 'away': int(self.away[row])},
+        }
+
+class Backtest:
+    """
+    Replays timelines through the live StrategyEngine: one bot cycle per tick on a simulated
+    clock, against a MemoryBackend, with no network and no sleeps. The alerts the bot would
+    have sent are collected in `notifications`. With `leagues`, only fixtures of those league
+    IDs are replayed.
+    """
+    def __init__(self, strategies, start=SIMULATION_START, leagues=None):
+        self.start = start
+        self.leagues = leagues
+        self.now = start
+        self.state_manager = StateManager(MemoryBackend(), clock=lambda: self.now)
+        self.engine = StrategyEngine(self.state_manager, strategies)
+        self.notifications = []
+        self.cycles = 0
+        self.evaluated = 0
+
+    def run(self, timelines):
+        bounds = np.searchsorted(timelines.tick, np.arange(timelines.ticks + 1))
+        included = None
+        if self.leagues is not None:
+            included = np.isin(timelines.league_id, list(self.leagues))[timelines.fixture_index]
+        for tick in range(timelines.ticks):
+            self.now = self.start + timedelta(seconds=tick * TICK_SECONDS)
+            entries = slice(bounds[tick], bounds[tick + 1])
+            if included is not None:
+                entries = bounds[tick] + np.flatnonzero(included[entries])
+            self.cycle(timelines, entries)
+        return self.report()
+
+    def cycle(self, timelines, entries):
+        """Same steps as run_bot_once, with the tick's timeline entries as the live snapshot."""
+        index_loaded = self.state_manager.begin_cycle()
+        try:
+            columns = timelines.columns(entries)
+            changed, _ = self.engine.diff_snapshot(columns)
+            rows, decisions = self.engine.select_candidates(columns, changed)
+            entry_rows = np.arange(entries.start, entries.stop) if isinstance(entries, slice) else entries
+            matches = [timelines.match(entry_rows[row]) for row in rows]
+            tracked_states = self.state_manager.get_tracked_matches(
+                match['fixture']['id'] for match in matches
+                if match['fixture']['status']['short'] not in STATUS_FINISHED
+            )
+            for row, match in zip(rows, matches):
+                self.engine.process(match, tracked_states, decisions.get(row))
+            if index_loaded:
+                self.engine.commit_snapshot()
+            self.evaluated += len(rows)
+        finally:
+            self.state_manager.flush_writes()
+            self.notifications.extend(self.state_manager.take_committed_notifications())
+            self.cycles += 1
+
+    def report(self):
+        """Bets and hit rate per strategy and per (strategy, league)."""
+        backend = self.state_manager.backend
+        bets = list(backend.stream('resolved_bets').values()) + list(backend.stream('unresolved_bets').values())
+        by_strategy, by_league = {}, {}
+        for bet in bets:
+            outcome = bet.get('outcome', 'open')
+            for table, key in ((by_strategy, bet['bet_type']), (by_league, (bet['bet_type'], bet.get('league_id'), bet.get('league')))):
+                counts = table.setdefault(key, {'bets': 0, 'win': 0, 'loss': 0, 'push': 0, 'open': 0})
+                counts['bets'] += 1
+                counts[outcome] = counts.get(outcome, 0) + 1
+        for table in (by_strategy, by_league):
+            for counts in table.values():
+                settled = counts['win'] + counts['loss'] + counts['push']
+                counts['hit_rate'] = round(counts['win'] / settled, 4) if settled else None
+        return {'strategies': by_strategy, 'leagues': by_league}
+
+def print_report(report, by_league=False):
+    print(f"{'strategy':<12} {'bets':>7} {'win':>7} {'loss':>7} {'push':>5} {'open':>5} {'hit rate':>9}")
+    for bet_type, counts in sorted(report['strategies'].items()):
+        hit_rate = '-' if counts['hit_rate'] is None else f"{100 * counts['hit_rate']:.1f}%"
+        print(f"{bet_type:<12} {counts['bets']:>7} {counts['win']:>7} {counts['loss']:>7} {counts['push']:>5} {counts['open']:>5} {hit_rate:>9}")
+    if not by_league:
+        return
+    print()
+    print(f"{'strategy':<12} {'league':<40} {'bets':>7} {'win':>7} {'hit rate':>9}")
+    for (bet_type, league_id, league), counts in sorted(report['leagues'].items(), key=lambda item: (item[0][0], -item[1]['bets'])):
+        hit_rate = '-' if counts['hit_rate'] is None else f"{100 * counts['hit_rate']:.1f}%"
+        print(f"{bet_type:<12} {f'{league} ({league_id})':<40} {counts['bets']:>7} {counts['win']:>7} {hit_rate:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded fixture timelines through the betting strategies.")
+    parser.add_argument('dataset', help="JSON / NDJSON (optionally .gz) timelines, or a directory saved with --save-arrays")
+    parser.add_argument('--strategies', default='regular,32_over,32_under,80_minute', help="Comma-separated bet types")
+    parser.add_argument('--by-league', action='store_true', help="Also report per league")
+    parser.add_argument('--leagues', help="Comma-separated league IDs to replay (default: all)")
+    parser.add_argument('--save-arrays', metavar='DIR', help="Convert the dataset to memory-mappable .npy arrays in DIR and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    started = time.perf_counter()
+    timelines = Timelines.load(args.dataset)
+    loaded = time.perf_counter()
+    if args.save_arrays:
+        timelines.save(args.save_arrays)
+        print(f"{len(timelines)} fixtures, {len(timelines.tick)} timeline entries saved to {args.save_arrays}")
+        return
+    leagues = [int(league_id) for league_id in args.leagues.split(',')] if args.leagues else None
+    backtest = Backtest(enabled_strategies(args.strategies), leagues=leagues)
+    report = backtest.run(timelines)
+    print(
+        f"{len(timelines)} fixtures, {backtest.cycles} cycles, {backtest.evaluated} evaluations: "
+        f"loaded in {loaded - started:.2f}s, replayed in {time.perf_counter() - loaded:.2f}s"
+    )
+    print_report(report, args.by_league)
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,11 @@ import os
 import json
 import time
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from rate_limit import ApiRateLimiter
 
 # Set up logging
 logging.basicConfig(
@@ -39,6 +41,8 @@ BET_TYPE_80_MINUTE = '80_minute'
 STATUS_LIVE = ['LIVE', '1H', '2H', 'ET', 'P']
 STATUS_HALFTIME = 'HT'
 STATUS_FINISHED = ['FT', 'AET', 'PEN']
+BET_TYPES_FT_RESOLUTION = [BET_TYPE_80_MINUTE] # Bet types settled by get_stale_unresolved_bets
+FIXTURE_IDS_PER_REQUEST = 20 # API-Football limit for fixtures?ids=
 BET_SCORES_80_MINUTE = ['2-0','0-3']
 
 class FirebaseManager:
@@ -90,36 +94,52 @@ class FirebaseManager:
     
     def get_stale_unresolved_bets(self, minutes_to_wait=20):
         """
-        Retrieves unresolved bets from Firestore that were placed more than `minutes_to_wait` ago.
-        These are bets that are likely for a finished match and need a final result check.
+        Retrieves unresolved bets that were placed more than `minutes_to_wait` ago and need
+        FT resolution (80' bets). The filtering runs server-side on the
+        (bet_type, placed_at) composite index declared in firestore.indexes.json.
         """
         try:
-            bets = self.db.collection('unresolved_bets').stream()
-            stale_bets = {}
-            time_threshold = datetime.utcnow() - timedelta(minutes=minutes_to_wait)
-            
-            for doc in bets:
-                bet_info = doc.to_dict()
-                placed_at_str = bet_info.get('placed_at')
-                # Only process 80_minute bets here
-                if bet_info.get('bet_type') == BET_TYPE_80_MINUTE:
-                    if placed_at_str:
-                        try:
-                            placed_at_dt = datetime.strptime(placed_at_str, '%Y-%m-%d %H:%M:%S')
-                            if placed_at_dt < time_threshold:
-                                stale_bets[doc.id] = bet_info
-                        except ValueError:
-                            logger.warning(f"Could not parse placed_at timestamp for bet {doc.id}")
-                            continue
-            return stale_bets
+            time_threshold = datetime.now(timezone.utc) - timedelta(minutes=minutes_to_wait)
+            query = (
+                self.db.collection('unresolved_bets')
+                .where(filter=FieldFilter('bet_type', 'in', BET_TYPES_FT_RESOLUTION))
+                .where(filter=FieldFilter('placed_at', '<', time_threshold))
+            )
+            # Bets of the multi-strategy worker (bot.py) are stored as "<fixture_id>-<bet_type>"
+            # and settled by it; this worker only owns the ones stored under the plain fixture ID
+            return {doc.id: doc.to_dict() for doc in query.stream() if doc.id.isdigit()}
         except Exception as e:
             logger.error(f"Firestore Error during get_stale_unresolved_bets: {e}")
             return {}
 
+    def migrate_placed_at_timestamps(self):
+        """
+        One-off conversion of legacy string `placed_at` values to native timestamps, which the
+        stale-bet query needs. A string range filter only matches string values, so this reads
+        just the legacy documents.
+        """
+        try:
+            legacy = self.db.collection('unresolved_bets').where(filter=FieldFilter('placed_at', '>=', '')).stream()
+            migrated = 0
+            for doc in legacy:
+                try:
+                    placed_at = datetime.strptime(doc.to_dict()['placed_at'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+                except ValueError:
+                    logger.warning(f"Could not parse placed_at timestamp for bet {doc.id}")
+                    continue
+                doc.reference.update({'placed_at': placed_at})
+                migrated += 1
+            if migrated:
+                logger.info(f"Migrated placed_at to timestamps for {migrated} unresolved bets")
+            return migrated
+        except Exception as e:
+            logger.error(f"Firestore Error during migrate_placed_at_timestamps: {e}")
+            return 0
+
     def add_unresolved_bet(self, match_id, data):
         try:
-            # Add a timestamp when the bet was placed
-            data['placed_at'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            # Add a native timestamp when the bet was placed (queried by get_stale_unresolved_bets)
+            data['placed_at'] = datetime.now(timezone.utc)
             self.db.collection('unresolved_bets').document(str(match_id)).set(data)
         except Exception as e:
             logger.error(f"Firestore Error during add_unresolved_bet: {e}")
@@ -181,22 +201,28 @@ def send_telegram(msg, max_retries=3):
     
     return False
 
-def handle_api_rate_limit(response):
-    """Handle API rate limiting by adjusting sleep time"""
-    if response.status_code == 429:
-        retry_after = int(response.headers.get('Retry-After', 60))
-        logger.warning(f"Rate limited. Sleeping for {retry_after} seconds")
-        time.sleep(retry_after)
-        return True
-    return False
+# Paces API-Football requests from its rate-limit headers and tracks the daily quota
+api_limiter = ApiRateLimiter()
+
+def api_get(url, **kwargs):
+    """
+    GET against API-Football, paced by the shared rate limiter.
+    Returns None when the request was skipped because the rate-limit budget is exhausted.
+    """
+    if not api_limiter.acquire():
+        logger.warning(f"API-Football request skipped, rate limit budget exhausted: {api_limiter.status()}")
+        return None
+    response = requests.get(url, headers=HEADERS, **kwargs)
+    api_limiter.update(response.status_code, response.headers)
+    return response
 
 def get_live_matches():
     """Fetch ONLY live matches from API"""
     url = f"{BASE_URL}/fixtures?live=all"
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        if handle_api_rate_limit(response):
-            return get_live_matches()
+        response = api_get(url, timeout=15)
+        if response is None:
+            return []
         if response.status_code != 200:
             logger.error(f"API ERROR: {response.status_code} - {response.text}")
             return []
@@ -211,9 +237,9 @@ def get_fixture_by_id(fixture_id):
     url = f"{BASE_URL}/fixtures"
     params = {'id': fixture_id}
     try:
-        response = requests.get(url, headers=HEADERS, params=params, timeout=15)
-        if handle_api_rate_limit(response):
-            return get_fixture_by_id(fixture_id)
+        response = api_get(url, params=params, timeout=15)
+        if response is None:
+            return None
         if response.status_code != 200:
             logger.error(f"API ERROR for fixture {fixture_id}: {response.status_code} - {response.text}")
             return None
@@ -223,6 +249,29 @@ def get_fixture_by_id(fixture_id):
         logger.error(f"Error fetching fixture {fixture_id}: {e}")
         return None
 
+def get_fixtures_by_ids(fixture_ids):
+    """
+    Fetch many fixtures with the multi-ID endpoint (fixtures?ids=a-b-c),
+    FIXTURE_IDS_PER_REQUEST IDs per request. Returns a dict keyed by fixture ID (as str).
+    """
+    ids = [str(fixture_id) for fixture_id in fixture_ids]
+    url = f"{BASE_URL}/fixtures"
+    fixtures = {}
+    for start in range(0, len(ids), FIXTURE_IDS_PER_REQUEST):
+        params = {'ids': '-'.join(ids[start:start + FIXTURE_IDS_PER_REQUEST])}
+        try:
+            response = api_get(url, params=params, timeout=15)
+            if response is None:
+                break
+            if response.status_code != 200:
+                logger.error(f"API ERROR for fixtures {params['ids']}: {response.status_code} - {response.text}")
+                continue
+            for match_data in response.json().get('response', []):
+                fixtures[str(match_data['fixture']['id'])] = match_data
+        except Exception as e:
+            logger.error(f"Error fetching fixtures {params['ids']}: {e}")
+    return fixtures
+
 def place_regular_bet(state, fixture_id, score, match_info):
     """Handles placing the initial 36' bet."""
     if score in ['1-1', '2-2', '3-3']:
@@ -332,14 +381,17 @@ def process_live_match(match):
 def check_and_resolve_stale_bets():
     """
     Checks and resolves old, unresolved bets by fetching their final status.
-    This function uses a direct API call for each bet and should be called sparingly.
+    All stale fixtures are fetched with a few multi-ID requests.
     """
     stale_bets = firebase_manager.get_stale_unresolved_bets()
     if not stale_bets:
         return
     
+    # One multi-ID request per FIXTURE_IDS_PER_REQUEST stale bets instead of one per bet
+    fixtures = get_fixtures_by_ids(stale_bets.keys())
+    
     for match_id, bet_info in stale_bets.items():
-        match_data = get_fixture_by_id(match_id)
+        match_data = fixtures.get(str(match_id))
         
         if not match_data:
             continue
@@ -359,7 +411,6 @@ def check_and_resolve_stale_bets():
                 
                 if send_telegram(message):
                     firebase_manager.move_to_resolved(match_id, bet_info, outcome)
-                time.sleep(1)
 
 def run_bot_once():
     """Run one complete cycle of the bot"""
@@ -375,6 +426,7 @@ def run_bot_once():
 
 if __name__ == "__main__":
     logger.info("Starting Football Betting Bot")
+    firebase_manager.migrate_placed_at_timestamps()
     send_telegram("🚀 Football Betting Bot Started Successfully!")
     
     while True:
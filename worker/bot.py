@@ -1,11 +1,19 @@
-import requests
 import os
-import json
-import time
 import logging
-from datetime import datetime, timedelta
-import firebase_admin
-from firebase_admin import credentials, firestore
+import time
+from storage import create_storage_backend
+from state import StateManager
+from http_client import HttpClient
+from rate_limit import ApiRateLimiter
+from scheduler import PollScheduler, FAST_POLL_INTERVAL
+from runner import FixedRateRunner
+from notifier import TelegramOutbox, StatusBoard
+from columns import FixtureColumns
+from history import FixtureHistory
+from capture import FeedCapture
+from strategies import (
+    StrategyEngine, enabled_strategies, STRATEGIES, RESOLVE_FT, STATUS_FINISHED
+)
 
 # Set up logging
 logging.basicConfig(
@@ -23,6 +31,16 @@ API_KEY = os.getenv("API_KEY")
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 FIREBASE_CREDENTIALS_JSON_STRING = os.getenv("FIREBASE_CREDENTIALS")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore") # firestore, sqlite or memory
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+TELEGRAM_DIGEST = os.getenv("TELEGRAM_DIGEST", "").lower() in ("1", "true", "yes") # One combined message per cycle
+TELEGRAM_BOARD = os.getenv("TELEGRAM_BOARD", "").lower() in ("1", "true", "yes") # One pinned, edited message per day
+STRATEGY_NAMES = os.getenv("STRATEGIES", "regular") # Comma-separated: regular, 32_over, 32_under, 80_minute
+CAPTURE_PATH = os.getenv("CAPTURE_PATH") # Optional directory receiving every raw API-Football response (for replay.py)
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH") # Optional SQLite file recording every live=all snapshot
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot_state.db"))
 
 HEADERS = {
     'x-rapidapi-key': API_KEY,
@@ -32,153 +50,117 @@ BASE_URL = 'https://v3.football.api-sports.io'
 
 # --- CONSTANTS ---
 SLEEP_TIME = 90
-MINUTES_REGULAR_BET = [35, 36, 37] # Only need the 36' window
-BET_TYPE_REGULAR = 'regular' # Only need the regular bet type
-STATUS_LIVE = ['LIVE', '1H', '2H', 'ET', 'P']
-STATUS_HALFTIME = 'HT'
-STATUS_FINISHED = ['FT', 'AET', 'PEN']
-# Removed: MINUTES_26_MINUTE_BET, MINUTES_32_MINUTE_BET, MINUTES_80_MINUTE_BET, 
-# Removed: BET_TYPE_26_OVER_HT, BET_TYPE_32_OVER, BET_TYPE_80_MINUTE, BET_SCORES_80_MINUTE
+FIXTURE_IDS_PER_REQUEST = 20 # API-Football limit for fixtures?ids=
+STALE_CHECK_INTERVAL = 300 # Seconds between two lookups of stale FT bets
+PENDING_RESCAN_INTERVAL = 600 # Seconds between two re-scans of undelivered outbox entries
 
-class FirebaseManager:
-    """Manages all interactions with the Firebase Firestore database."""
-    def __init__(self, credentials_json_string):
-        try:
-            logger.info("Initializing Firebase...")
-            if not credentials_json_string:
-                logger.warning("FIREBASE_CREDENTIALS_JSON is empty. Skipping Firebase initialization.")
-                self.db = None
-                return
+# Initialize storage
+try:
+    state_manager = StateManager(create_storage_backend(
+        STORAGE_BACKEND, FIREBASE_CREDENTIALS_JSON_STRING, SQLITE_DB_PATH
+    ))
+except Exception as e:
+    logger.critical(f"Critical storage initialization error: {e}")
+    state_manager = StateManager(None)
+    logger.warning("Continuing bot execution with disabled storage functionality.")
 
-            cred_dict = json.loads(credentials_json_string)
-            cred = credentials.Certificate(cred_dict)
-            if not firebase_admin._apps:
-                firebase_admin.initialize_app(cred)
-            self.db = firestore.client()
-            logger.info("Firebase initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Firebase: {e}")
-            self.db = None
-            raise
+# Shared keep-alive sessions for API-Football and Telegram
+http_client = HttpClient(pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES)
+# Paces API-Football requests from its rate-limit headers and tracks the daily quota
+api_limiter = ApiRateLimiter()
+# Telegram alerts are queued and sent by a background thread with retries and backoff;
+# bet alerts are marked as delivered in the durable outbox once Telegram accepted them
+telegram_outbox = TelegramOutbox(
+    http_client, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, on_delivered=state_manager.mark_notification_delivered
+)
+# Optional single pinned message per day, edited as bets are placed and settled
+status_board = StatusBoard(
+    telegram_outbox, state_manager.get_status_board, state_manager.save_status_board,
+    on_delivered=state_manager.mark_notification_delivered
+)
+# Every enabled rule is evaluated against the same live=all snapshot
+strategy_engine = StrategyEngine(state_manager, enabled_strategies(STRATEGY_NAMES))
+# Polls fast when fixtures are near a strategy window, slower when none are
+poll_scheduler = PollScheduler(strategy_engine.windows, idle_interval=SLEEP_TIME)
+# Optional local history of every fetched snapshot, for backtests and league statistics
+fixture_history = None
+if HISTORY_DB_PATH:
+    try:
+        fixture_history = FixtureHistory(HISTORY_DB_PATH)
+    except Exception as e:
+        logger.error(f"Fixture history disabled, cannot open {HISTORY_DB_PATH}: {e}")
+# Optional gzip NDJSON capture of the raw API responses, replayed by replay.py
+feed_capture = FeedCapture(CAPTURE_PATH) if CAPTURE_PATH else None
+# Monotonic time of the last stale FT bet lookup
+last_stale_check = None
+# Monotonic time of the last re-scan of undelivered outbox entries
+last_pending_rescan = None
+# Clock of the stale lookup throttle; replay.py runs the worker on simulated time
+monotonic = time.monotonic
 
-    # Note: All Firebase methods should check if self.db is not None
-    def get_tracked_match(self, match_id):
-        if not self.db: return None
-        try:
-            doc = self.db.collection('tracked_matches').document(str(match_id)).get()
-            return doc.to_dict() if doc.exists else None
-        except Exception as e:
-            logger.error(f"Firestore Error during get_tracked_match: {e}")
-            return None
+def send_telegram(msg, key=None):
+    """Queue a Telegram message for the background sender; never blocks on the Telegram API"""
+    if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
+        logger.warning(f"Telegram credentials missing. Message not sent: {msg}")
+        return False
+    return telegram_outbox.submit(msg, key=key)
 
-    def update_tracked_match(self, match_id, data):
-        if not self.db: return
-        try:
-            self.db.collection('tracked_matches').document(str(match_id)).set(data, merge=True)
-        except Exception as e:
-            logger.error(f"Firestore Error during update_tracked_match: {e}")
-            
-    def delete_tracked_match(self, match_id):
-        if not self.db: return
-        try:
-            self.db.collection('tracked_matches').document(str(match_id)).delete()
-        except Exception as e:
-            logger.error(f"Firestore Error during delete_tracked_match: {e}")
+def send_notifications(notifications):
+    """Queues outbox entries, one message each or, in digest mode, combined into as few as possible."""
+    if not notifications:
+        return
+    if TELEGRAM_BOARD and TELEGRAM_TOKEN and TELEGRAM_CHAT_ID:
+        # Shown on the board by the refresh dispatch_notifications() queues
+        status_board.add(notifications)
+        return
+    if TELEGRAM_DIGEST and TELEGRAM_TOKEN and TELEGRAM_CHAT_ID:
+        telegram_outbox.submit_digest(notifications)
+        return
+    for notification in notifications:
+        send_telegram(notification['text'], key=notification['key'])
 
-    def get_unresolved_bets(self):
-        if not self.db: return {}
-        try:
-            bets = self.db.collection('unresolved_bets').stream()
-            result = {doc.id: doc.to_dict() for doc in bets}
-            return result
-        except Exception as e:
-            logger.error(f"Firestore Error during get_unresolved_bets: {e}")
-            return {}
-    
-    # Removed: get_stale_unresolved_bets as it was only for FT bets (80'/32')
+def dispatch_notifications():
+    """Hands the outbox entries committed this cycle to the sender."""
+    send_notifications(state_manager.take_committed_notifications())
+    if TELEGRAM_BOARD and TELEGRAM_TOKEN and TELEGRAM_CHAT_ID:
+        # Edited on the sender thread; the cycle never waits on Telegram
+        status_board.request_refresh()
 
-    def add_unresolved_bet(self, match_id, data):
-        if not self.db: return
-        try:
-            # Add a timestamp when the bet was placed
-            data['placed_at'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-            self.db.collection('unresolved_bets').document(str(match_id)).set(data)
-        except Exception as e:
-            logger.error(f"Firestore Error during add_unresolved_bet: {e}")
+def resume_pending_notifications():
+    """
+    Re-queues outbox entries that were committed but never delivered: left by a previous run
+    at startup, then the ones the sender gave up on during a Telegram or network outage.
+    Entries still queued in this process are not sent twice.
+    """
+    global last_pending_rescan
+    last_pending_rescan = monotonic()
+    pending = state_manager.get_pending_notifications()
+    if pending:
+        logger.info(f"Resuming {len(pending)} undelivered notifications")
+    send_notifications(pending)
 
-    def move_to_resolved(self, match_id, bet_info, outcome):
-        if not self.db: return False
-        try:
-            resolved_data = {
-                **bet_info,
-                'outcome': outcome,
-                'resolved_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-                'resolution_timestamp': firestore.SERVER_TIMESTAMP
-            } 
-            self.db.collection('resolved_bets').document(str(match_id)).set(resolved_data)
-            self.db.collection('unresolved_bets').document(str(match_id)).delete()
-            return True
-        except Exception as e:
-            logger.error(f"Firestore Error during move_to_resolved: {e}")
-            return False
+def rescan_pending_notifications():
+    """Runs resume_pending_notifications() every PENDING_RESCAN_INTERVAL seconds."""
+    if last_pending_rescan is not None and monotonic() - last_pending_rescan < PENDING_RESCAN_INTERVAL:
+        return
+    resume_pending_notifications()
 
-    def add_to_resolved_bets(self, match_id, bet_info, outcome):
-        if not self.db: return False
+def api_get(url, **kwargs):
+    """
+    GET against API-Football, paced by the shared rate limiter.
+    Returns None when the request was skipped because the rate-limit budget is exhausted.
+    """
+    if not api_limiter.acquire():
+        logger.warning(f"API-Football request skipped, rate limit budget exhausted: {api_limiter.status()}")
+        return None
+    response = http_client.get(url, headers=HEADERS, **kwargs)
+    api_limiter.update(response.status_code, response.headers)
+    if feed_capture:
         try:
-            resolved_data = {
-                **bet_info,
-                'outcome': outcome,
-                'resolved_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-                'resolution_timestamp': firestore.SERVER_TIMESTAMP
-            }
-            # Use a unique ID based on match and timestamp since this is an append operation
-            doc_id = f"{match_id}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
-            self.db.collection('resolved_bets').document(doc_id).set(resolved_data)
-            return True
+            feed_capture.record(url, kwargs.get('params'), response)
         except Exception as e:
-            logger.error(f"Firestore Error during add_to_resolved_bets: {e}")
-            return False
-
-# Initialize Firebase
-try:
-    firebase_manager = FirebaseManager(FIREBASE_CREDENTIALS_JSON_STRING)
-except Exception as e:
-    logger.critical(f"Critical Firebase initialization error: {e}")
-    if not firebase_manager.db:
-        logger.warning("Continuing bot execution with disabled Firebase functionality.")
-
-def send_telegram(msg, max_retries=3):
-    """Send Telegram message with retry mechanism"""
-    if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
-        logger.warning(f"Telegram credentials missing. Message not sent: {msg}")
-        return False
-        
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    data = {'chat_id': TELEGRAM_CHAT_ID, 'text': msg}
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                return True
-            else:
-                logger.error(f"Telegram error (attempt {attempt + 1}): {response.status_code} - {response.text}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Network Error sending Telegram message (attempt {attempt + 1}): {e}")
-        
-        if attempt < max_retries - 1:
-            time.sleep(2 ** attempt)
-    
-    return False
-
-def handle_api_rate_limit(response):
-    """Handle API rate limiting by adjusting sleep time"""
-    if response.status_code == 429:
-        retry_after = int(response.headers.get('Retry-After', 60))
-        logger.warning(f"Rate limited. Sleeping for {retry_after} seconds")
-        time.sleep(retry_after)
-        return True
-    return False
+            logger.error(f"Could not capture response of {url}: {e}")
+    return response
 
 def get_live_matches():
     """Fetch ONLY live matches from API"""
@@ -188,9 +170,9 @@ def get_live_matches():
         
     url = f"{BASE_URL}/fixtures?live=all"
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        if handle_api_rate_limit(response):
-            return get_live_matches()
+        response = api_get(url, timeout=15)
+        if response is None:
+            return []
         if response.status_code != 200:
             logger.error(f"API ERROR: {response.status_code} - {response.text}")
             return []
@@ -207,9 +189,9 @@ def get_fixture_by_id(fixture_id):
     url = f"{BASE_URL}/fixtures"
     params = {'id': fixture_id}
     try:
-        response = requests.get(url, headers=HEADERS, params=params, timeout=15)
-        if handle_api_rate_limit(response):
-            return get_fixture_by_id(fixture_id)
+        response = api_get(url, params=params, timeout=15)
+        if response is None:
+            return None
         if response.status_code != 200:
             logger.error(f"API ERROR for fixture {fixture_id}: {response.status_code} - {response.text}")
             return None
@@ -219,130 +201,163 @@ def get_fixture_by_id(fixture_id):
         logger.error(f"Error fetching fixture {fixture_id}: {e}")
         return None
 
-def place_regular_bet(state, fixture_id, score, match_info):
-    """Handles placing the 36' correct score bet."""
-    if score in ['1-1', '2-2', '3-3']:
-        state['36_bet_placed'] = True
-        state['36_score'] = score
-        firebase_manager.update_tracked_match(fixture_id, state)
-        unresolved_data = {
-            'match_name': match_info['match_name'],
-            'placed_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-            'league': match_info['league_name'],
-            'country': match_info['country'],
-            'league_id': match_info['league_id'],
-            'bet_type': BET_TYPE_REGULAR,
-            '36_score': score,
-            'fixture_id': fixture_id
-        }
-        firebase_manager.add_unresolved_bet(fixture_id, unresolved_data)
-        send_telegram(f"⏱️ 36' - {match_info['match_name']}\n🏆 {match_info['league_name']} ({match_info['country']})\n🔢 Score: {score}\n🎯 Correct Score Bet Placed")
-    else:
-        state['36_bet_placed'] = True
-        firebase_manager.update_tracked_match(fixture_id, state)
-
-# Removed: place_26_over_ht_bet
-# Removed: place_32_over_bet
-# Removed: place_80_minute_bet
+def get_fixtures_by_ids(fixture_ids):
+    """
+    Fetch many fixtures with the multi-ID endpoint (fixtures?ids=a-b-c),
+    FIXTURE_IDS_PER_REQUEST IDs per request. Returns a dict keyed by fixture ID (as str).
+    """
+    if not API_KEY: return {}
+    ids = [str(fixture_id) for fixture_id in fixture_ids]
+    url = f"{BASE_URL}/fixtures"
+    fixtures = {}
+    for start in range(0, len(ids), FIXTURE_IDS_PER_REQUEST):
+        params = {'ids': '-'.join(ids[start:start + FIXTURE_IDS_PER_REQUEST])}
+        try:
+            response = api_get(url, params=params, timeout=15)
+            if response is None:
+                break
+            if response.status_code != 200:
+                logger.error(f"API ERROR for fixtures {params['ids']}: {response.status_code} - {response.text}")
+                continue
+            for match_data in response.json().get('response', []):
+                fixtures[str(match_data['fixture']['id'])] = match_data
+        except Exception as e:
+            logger.error(f"Error fetching fixtures {params['ids']}: {e}")
+    return fixtures
 
-def check_ht_result(state, fixture_id, score, match_info):
-    """Checks the result of the 36' bet at halftime."""
-    
-    current_score = score
-    unresolved_bet_data = firebase_manager.get_unresolved_bets().get(str(fixture_id))
+def record_history(matches):
+    """Appends a fetched snapshot to the local fixture history, if enabled; never fails the cycle."""
+    if not fixture_history or not matches:
+        return
+    try:
+        fixture_history.record_snapshot(matches)
+    except Exception as e:
+        logger.error(f"Could not record {len(matches)} fixtures to history: {e}")
 
-    if unresolved_bet_data and unresolved_bet_data.get('bet_type') == BET_TYPE_REGULAR:
-        
-        outcome = 'win' if current_score == unresolved_bet_data.get('36_score', '') else 'loss'
-        
-        message = (
-            f"✅ HT Result: {match_info['match_name']}\n"
-            f"🏆 {match_info['league_name']} ({match_info['country']})\n"
-            f"🔢 Score: {current_score}\n"
-            f"🎉 36' Bet WON"
-        ) if outcome == 'win' else (
-            f"❌ HT Result: {match_info['match_name']}\n"
-            f"🏆 {match_info['league_name']} ({match_info['country']})\n"
-            f"🔢 Score: {current_score}\n"
-            f"🔁 36' Bet LOST"
-        )
-            
-        if outcome:
-            firebase_manager.move_to_resolved(fixture_id, unresolved_bet_data, outcome)
-            send_telegram(message)
-    
-    # Delete tracked match state once the 36' bet is resolved or if no bet was placed/found
-    firebase_manager.delete_tracked_match(fixture_id)
+def process_live_match(match, tracked_states=None, decisions=None):
+    """
+    Processes a single live match with every enabled strategy.
+    `tracked_states` is the map prefetched by get_tracked_matches; without it the
+    state is read from storage for this fixture alone.
+    """
+    strategy_engine.process(match, tracked_states, decisions)
 
-def process_live_match(match):
+def check_and_resolve_stale_bets(live_fixture_ids):
     """
-    Processes a single live match for the 36' bet.
+    Settles FT bets whose fixture has left the live feed (live=all drops finished fixtures
+    quickly), fetching their final status with a few multi-ID requests.
     """
-    fixture = match['fixture']
-    teams = match['teams']
-    goals = match['goals']
-    fixture_id = fixture['id']
-    match_name = f"{teams['home']['name']} vs {teams['away']['name']}"
-    minute = fixture['status']['elapsed']
-    status = fixture['status']['short'] 
-    home_goals = goals['home'] if goals['home'] is not None else 0
-    away_goals = goals['away'] if goals['away'] is not None else 0
-    score = f"{home_goals}-{away_goals}"
-    
-    if status.upper() not in STATUS_LIVE and status.upper() != STATUS_HALFTIME:
-        return
-    if minute is None and status.upper() not in [STATUS_HALFTIME]:
+    global last_stale_check
+    now = monotonic()
+    if last_stale_check is not None and now - last_stale_check < STALE_CHECK_INTERVAL:
         return
-    
-    state = firebase_manager.get_tracked_match(fixture_id) or {
-        '36_bet_placed': False,
-        '36_score': None,
-        # Removed: '32_bet_placed', '26_ht_bet_placed', '80_bet_placed', '80_score'
-    }
-    
-    match_info = {
-        'match_name': match_name,
-        'league_name': match['league']['name'],
-        'country': match['league']['country'],
-        'league_id': match['league']['id']
+    ft_types = [bet_type for bet_type, strategy in STRATEGIES.items() if strategy.resolution == RESOLVE_FT]
+    stale_bets = {
+        doc_id: bet for doc_id, bet in state_manager.get_stale_unresolved_bets(ft_types).items()
+        if str(bet.get('fixture_id')) not in live_fixture_ids
     }
+    if not stale_bets:
+        return
+    last_stale_check = now
+    # One multi-ID request per FIXTURE_IDS_PER_REQUEST stale bets instead of one per bet
+    fixtures = get_fixtures_by_ids({bet['fixture_id'] for bet in stale_bets.values()})
+    # Final states the live feed dropped before they could be recorded
+    record_history(list(fixtures.values()))
+    for match_data in fixtures.values():
+        if (match_data['fixture']['status']['short'] or '').upper() in STATUS_FINISHED:
+            strategy_engine.process(match_data)
 
-    # 1. 36' Regular Bet Check
-    if status.upper() == '1H' and minute in MINUTES_REGULAR_BET and not state.get('36_bet_placed'):
-        place_regular_bet(state, fixture_id, score, match_info)
-        
-    # 2. Halftime Resolution
-    elif status.upper() == STATUS_HALFTIME and firebase_manager.get_unresolved_bets().get(str(fixture_id)):
-        # Check if the bet is still unresolved
-        check_ht_result(state, fixture_id, score, match_info)
-    
-    # If the match is finished and there are no unresolved bets, delete the tracked match state
-    if status in STATUS_FINISHED and not firebase_manager.get_unresolved_bets().get(str(fixture_id)):
-        firebase_manager.delete_tracked_match(fixture_id)
+def select_candidate_matches(columns, changed=None):
+    """
+    Keeps only the fixtures that can trigger an action this cycle: inside an enabled
+    strategy's window, at HT with a pending HT bet, or finished (FT settlement and cleanup).
+    The rules are evaluated as vectorized masks over the columnar snapshot.
+    Returns the candidate rows, the per-row strategy decisions and the number of fixtures dropped.
+    """
+    rows, decisions = strategy_engine.select_candidates(columns, changed)
+    considered = len(columns) if changed is None else int(changed.sum())
+    return rows, decisions, considered - len(rows)
+
+def next_poll_interval():
+    """
+    Seconds between two cycle starts: adaptive to the strategy windows, but never faster
+    than the remaining daily API quota allows.
+    """
+    return max(poll_scheduler.next_interval(), api_limiter.poll_interval(FAST_POLL_INTERVAL))
+
+def next_poll_wakeup():
+    """
+    Seconds from now until a fixture enters a strategy window, to poll exactly then.
+    None when there is no such wake-up or the daily quota only allows the regular cadence.
+    """
+    if api_limiter.poll_interval(FAST_POLL_INTERVAL) > FAST_POLL_INTERVAL:
+        return None
+    return poll_scheduler.next_wakeup()
 
-# Removed: check_and_resolve_stale_bets (No bets require FT resolution now)
+def report_cycle_error(e):
+    error_msg = f"❌ CRITICAL ERROR: {str(e)}"
+    logger.critical(error_msg, exc_info=e)
+    send_telegram(error_msg[:300])
 
 def run_bot_once():
     """Run one complete cycle of the bot"""
     logger.info("Starting bot cycle...")
     
-    live_matches = get_live_matches()
-    for match in live_matches:
-        process_live_match(match)
+    # Read the unresolved bets once; every lookup in this cycle is served from memory,
+    # and all writes are buffered until the end of the cycle
+    index_loaded = state_manager.begin_cycle()
+    try:
+        live_matches = get_live_matches()
+        record_history(live_matches)
+        # Columnar copy of the snapshot: fixture_id, elapsed, status, goals, league_id arrays
+        columns = FixtureColumns.from_matches(live_matches)
+        # Fixtures unchanged since the previous poll were already evaluated in that state
+        changed, deltas = strategy_engine.diff_snapshot(columns)
+        rows, decisions, dropped = select_candidate_matches(columns, changed)
+        candidates = [live_matches[row] for row in rows]
+        changed_count = int(changed.sum())
+        logger.info(
+            f"{len(live_matches)} live fixtures, {changed_count} changed {deltas}, "
+            f"{len(live_matches) - changed_count} unchanged skipped, {len(candidates)} candidates, {dropped} dropped"
+        )
+        # One batched read for the state of every fixture that still needs it
+        tracked_states = state_manager.get_tracked_matches(
+            match['fixture']['id'] for match in candidates
+            if (match['fixture']['status']['short'] or '').upper() not in STATUS_FINISHED
+        )
+        for row, match in zip(rows, candidates):
+            process_live_match(match, tracked_states, decisions.get(row))
+        check_and_resolve_stale_bets({str(fixture_id) for fixture_id in columns.fixture_id})
+        if index_loaded:
+            strategy_engine.commit_snapshot()
+        else:
+            # Pending bets were invisible this cycle (e.g. an HT settlement was missed);
+            # keeping the previous snapshot makes the next cycle evaluate every fixture again
+            logger.warning("Unresolved bets could not be loaded, re-evaluating all fixtures next cycle")
+        poll_scheduler.observe(live_matches, strategy_engine.ht_pending_fixture_ids())
+    finally:
+        state_manager.flush_writes()
+        # Only alerts whose bet writes were committed are sent
+        dispatch_notifications()
+        rescan_pending_notifications()
+        http_client.log_stats()
+        logger.info(f"API-Football quota: {api_limiter.status()}")
+        logger.info(f"Telegram outbox: {telegram_outbox.stats()}")
+        if TELEGRAM_BOARD:
+            logger.info(f"Status board: {status_board.stats()}")
     
     logger.info("Bot cycle completed.")
 
 if __name__ == "__main__":
     logger.info("Starting Football Betting Bot")
     # Initial startup message
-    send_telegram("🚀 Football Betting Bot Started Successfully! Monitoring live games for the 36' bet.")
+    send_telegram(
+        "🚀 Football Betting Bot Started Successfully! Monitoring live games for: "
+        + ", ".join(strategy.label for strategy in strategy_engine.strategies)
+    )
+    resume_pending_notifications()
     
-    while True:
-        try:
-            run_bot_once()
-        except Exception as e:
-            error_msg = f"❌ CRITICAL ERROR: {str(e)}"
-            logger.critical(error_msg, exc_info=True)
-            send_telegram(error_msg[:300])
-        finally:
-            time.sleep(SLEEP_TIME)
+    # Fixed-rate cadence: cycle duration does not push back the next start
+    FixedRateRunner(
+        run_bot_once, next_poll_interval, on_error=report_cycle_error, wakeup_fn=next_poll_wakeup
+    ).run_forever()
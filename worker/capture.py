@@ -0,0 +1,89 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+FILE_PATTERN = 'api-*.ndjson.gz'
+# Response headers kept with each capture; the rate limiter is replayed from them
+CAPTURED_HEADERS = ('x-ratelimit-', 'retry-after')
+
+class FeedCapture:
+    """
+    Appends every API-Football response, timestamped, to gzip-compressed NDJSON files in
+    `directory`: one file per process start and UTC day, named api-YYYYmmdd-HHMMSS.ndjson.gz.
+    Each line is {"ts", "url", "params", "status", "headers", "body"} with the raw body text.
+    Every record is flushed, so a crash loses at most the gzip trailer, which read_capture
+    tolerates.
+    """
+    def __init__(self, directory, clock=time.time):
+        self.directory = directory
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file = None
+        self._day = None
+        self.path = None
+        self.records = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self, now):
+        stamp = datetime.fromtimestamp(now, timezone.utc)
+        if self._file is not None and stamp.date() == self._day:
+            return
+        self._close_file()
+        self._day = stamp.date()
+        self.path = os.path.join(self.directory, f"api-{stamp:%Y%m%d-%H%M%S}.ndjson.gz")
+        self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        logger.info(f"Capturing API responses to {self.path}")
+
+    def record(self, url, params, response):
+        now = self._clock()
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower().startswith(CAPTURED_HEADERS)
+        }
+        line = json.dumps({
+            'ts': round(now, 3), 'url': url, 'params': params, 'status': response.status_code,
+            'headers': headers, 'body': response.text,
+        })
+        with self._lock:
+            self._open(now)
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.records += 1
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+
+def capture_files(path):
+    """Capture files at `path` (a file or a directory of them), oldest first."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, FILE_PATTERN)))
+    return [path]
+
+def read_capture(path):
+    """Captured records of `path` in time order; a truncated file keeps the records before the damage."""
+    records = []
+    for file_path in capture_files(path):
+        try:
+            with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+        except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError) as e:
+            logger.warning(f"Capture {file_path} is truncated, keeping the records before the damage: {e}")
+    records.sort(key=lambda record: record['ts'])
+    return records
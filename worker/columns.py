@@ -0,0 +1,74 @@
+import numpy as np
+
+# --- CONSTANTS ---
+# Fixture status -> int8 code in the status column; statuses not listed map to 0
+STATUS_CODES = {
+    '1H': 1, 'HT': 2, '2H': 3, 'ET': 4, 'BT': 5, 'P': 6, 'LIVE': 7, 'SUSP': 8, 'INT': 9,
+    'FT': 10, 'AET': 11, 'PEN': 12,
+}
+NO_MINUTE = -1 # elapsed is None
+
+def status_code(status):
+    return STATUS_CODES.get((status or '').upper(), 0)
+
+class FixtureColumns:
+    """
+    Columnar view of a live=all response: one NumPy array per field (fixture_id, elapsed,
+    status code, home goals, away goals, league_id), row i being `matches[i]`. Strategy
+    predicates are evaluated over the columns as vectorized masks instead of fixture by fixture.
+    Missing goals count as 0 and a missing minute as NO_MINUTE.
+    """
+    def __init__(self, fixture_id, elapsed, status, home, away, league_id, matches=None):
+        self.fixture_id = fixture_id
+        self.elapsed = elapsed
+        self.status = status
+        self.home = home
+        self.away = away
+        self.league_id = league_id
+        self.matches = matches if matches is not None else []
+
+    @classmethod
+    def from_matches(cls, matches):
+        rows = np.empty((len(matches), 6), dtype=np.int64)
+        for index, match in enumerate(matches):
+            fixture = match['fixture']
+            goals = match['goals']
+            elapsed = fixture['status']['elapsed']
+            rows[index] = (
+                fixture['id'],
+                NO_MINUTE if elapsed is None else elapsed,
+                status_code(fixture['status']['short']),
+                goals['home'] or 0,
+                goals['away'] or 0,
+                match['league']['id'] or 0,
+            )
+        return cls(
+            rows[:, 0].copy(), rows[:, 1].astype(np.int16), rows[:, 2].astype(np.int8),
+            rows[:, 3].astype(np.int16), rows[:, 4].astype(np.int16), rows[:, 5].copy(), list(matches)
+        )
+
+    def __len__(self):
+        return len(self.fixture_id)
+
+    def status_in(self, statuses):
+        return np.isin(self.status, [status_code(status) for status in statuses])
+
+    def minute_in(self, minutes):
+        return np.isin(self.elapsed, list(minutes))
+
+    def score_in(self, scores):
+        """Rows whose score is one of `scores`, given as (home, away) pairs."""
+        mask = np.zeros(len(self), dtype=bool)
+        for home, away in scores:
+            mask |= (self.home == home) & (self.away == away)
+        return mask
+
+    def lookup(self, fixture_ids):
+        """Row of each fixture ID in these columns, and a mask of the IDs that were found."""
+        fixture_ids = np.asarray(fixture_ids, dtype=np.int64)
+        if not len(self):
+            return np.zeros(len(fixture_ids), dtype=np.int64), np.zeros(len(fixture_ids), dtype=bool)
+        order = np.argsort(self.fixture_id, kind='stable')
+        positions = np.searchsorted(self.fixture_id[order], fixture_ids).clip(0, len(self) - 1)
+        rows = order[positions]
+        return rows, self.fixture_id[rows] == fixture_ids
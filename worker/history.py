@@ -0,0 +1,330 @@
+import argparse
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+FINISHED_STATUSES = ('FT', 'AET', 'PEN')
+# Order of the statuses within a fixture's timeline
+STATUS_ORDER = {'1H': 0, 'HT': 1, '2H': 2, 'ET': 3, 'BT': 3, 'P': 4, 'FT': 5, 'AET': 5, 'PEN': 5}
+RUNNING_STATUSES = ('1H', '2H', 'ET')
+FIRST_HALF_MINUTES = 45
+FULL_TIME_MINUTES = 90
+NON_SCORING_GOALS = ('Missed Penalty',)
+EXPORT_BATCH = 500 # Fixtures read per timeline query on export
+
+SCHEMA = [
+    # Latest known state of each fixture
+    "CREATE TABLE IF NOT EXISTS fixtures ("
+    "fixture_id INTEGER PRIMARY KEY, date TEXT, kickoff TEXT, league_id INTEGER, league TEXT, country TEXT, "
+    "season INTEGER, home_id INTEGER, home TEXT, away_id INTEGER, away TEXT, status TEXT, elapsed INTEGER, "
+    "home_goals INTEGER, away_goals INTEGER, ht_home INTEGER, ht_away INTEGER, updated_at TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_fixtures_date ON fixtures (date)",
+    "CREATE INDEX IF NOT EXISTS idx_fixtures_league_date ON fixtures (league_id, date)",
+    # One row per (fixture, status, minute) seen in a live snapshot, the latest observation winning;
+    # clustered by fixture so one fixture's timeline is a single range read
+    "CREATE TABLE IF NOT EXISTS timeline ("
+    "fixture_id INTEGER, status TEXT, elapsed INTEGER, home_goals INTEGER, away_goals INTEGER, observed_at TEXT, "
+    "PRIMARY KEY (fixture_id, status, elapsed)) WITHOUT ROWID",
+    # fixtures/events entries in feed order
+    "CREATE TABLE IF NOT EXISTS events ("
+    "fixture_id INTEGER, seq INTEGER, elapsed INTEGER, extra INTEGER, team_id INTEGER, type TEXT, detail TEXT, "
+    "player TEXT, PRIMARY KEY (fixture_id, seq)) WITHOUT ROWID",
+]
+
+UPSERT_FIXTURE = (
+    "INSERT INTO fixtures (fixture_id, date, kickoff, league_id, league, country, season, home_id, home, away_id, away, "
+    "status, elapsed, home_goals, away_goals, ht_home, ht_away, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (fixture_id) DO UPDATE SET date=excluded.date, kickoff=excluded.kickoff, league_id=excluded.league_id, "
+    "league=excluded.league, country=excluded.country, season=excluded.season, home_id=excluded.home_id, "
+    "home=excluded.home, away_id=excluded.away_id, away=excluded.away, status=excluded.status, elapsed=excluded.elapsed, "
+    "home_goals=excluded.home_goals, away_goals=excluded.away_goals, "
+    "ht_home=COALESCE(excluded.ht_home, fixtures.ht_home), ht_away=COALESCE(excluded.ht_away, fixtures.ht_away), "
+    "updated_at=excluded.updated_at"
+)
+UPSERT_TIMELINE = (
+    "INSERT INTO timeline (fixture_id, status, elapsed, home_goals, away_goals, observed_at) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (fixture_id, status, elapsed) DO UPDATE SET home_goals=excluded.home_goals, "
+    "away_goals=excluded.away_goals, observed_at=excluded.observed_at"
+)
+
+def _fixture_row(match, observed_at):
+    fixture, league, teams, goals = match['fixture'], match.get('league') or {}, match.get('teams') or {}, match.get('goals') or {}
+    home, away = teams.get('home') or {}, teams.get('away') or {}
+    halftime = (match.get('score') or {}).get('halftime') or {}
+    kickoff = fixture.get('date')
+    return (
+        fixture['id'], kickoff[:10] if kickoff else None, kickoff, league.get('id'), league.get('name'),
+        league.get('country'), league.get('season'), home.get('id'), home.get('name'), away.get('id'), away.get('name'),
+        (fixture['status'].get('short') or '').upper(), fixture['status'].get('elapsed'),
+        goals.get('home'), goals.get('away'), halftime.get('home'), halftime.get('away'), observed_at
+    )
+
+def _response(document):
+    """Entries of an API-Football response document, or the document itself if it is a list."""
+    return document.get('response', []) if isinstance(document, dict) else document
+
+def build_timeline(observations, final=None):
+    """
+    One [status, elapsed, home goals, away goals] entry per match minute from sparse
+    (status, elapsed, home, away) observations: minutes between two observations of the same
+    period carry the earlier score. `final`, the fixture's finished state, is appended when the
+    observations stop before the end.
+    """
+    ordered = sorted(observations, key=lambda entry: (STATUS_ORDER.get(entry[0], len(STATUS_ORDER)), entry[1] or 0))
+    timeline = []
+    for status, elapsed, home_goals, away_goals in ordered:
+        if timeline and timeline[-1][0] == status and status in RUNNING_STATUSES and elapsed is not None:
+            _, last_elapsed, last_home, last_away = timeline[-1]
+            timeline.extend([status, minute, last_home, last_away] for minute in range(last_elapsed + 1, elapsed))
+        timeline.append([status, elapsed, home_goals or 0, away_goals or 0])
+    if final and (not timeline or timeline[-1][0] not in FINISHED_STATUSES):
+        timeline.append(list(final))
+    return timeline
+
+def timeline_from_events(fixture, events):
+    """
+    Minute-by-minute timeline of a finished fixture rebuilt from its goal events, for fixtures
+    that were never recorded live. Goals count for the event's team from the minute they are
+    reported in; extra time is not rebuilt.
+    """
+    home_id = fixture['home_id']
+    goals = [
+        (elapsed, team_id == home_id) for elapsed, extra, team_id, kind, detail in events
+        if kind == 'Goal' and detail not in NON_SCORING_GOALS and elapsed is not None
+    ]
+    def score(minute):
+        home = sum(1 for elapsed, is_home in goals if elapsed <= minute and is_home)
+        return home, sum(1 for elapsed, is_home in goals if elapsed <= minute and not is_home)
+
+    observations = [('1H', minute, *score(minute)) for minute in range(1, FIRST_HALF_MINUTES + 1)]
+    ht_home, ht_away = score(FIRST_HALF_MINUTES)
+    if fixture['ht_home'] is not None:
+        ht_home, ht_away = fixture['ht_home'], fixture['ht_away']
+    observations.append(('HT', FIRST_HALF_MINUTES, ht_home, ht_away))
+    observations += [('2H', minute, *score(minute)) for minute in range(FIRST_HALF_MINUTES + 1, FULL_TIME_MINUTES + 1)]
+    return build_timeline(observations, _final_entry(fixture))
+
+def _final_entry(fixture):
+    if fixture['status'] not in FINISHED_STATUSES:
+        return None
+    return [fixture['status'], fixture['elapsed'] or FULL_TIME_MINUTES, fixture['home_goals'] or 0, fixture['away_goals'] or 0]
+
+class FixtureHistory:
+    """
+    Local SQLite (WAL) store of fixture history: the latest state of every fixture, indexed by
+    date and by league + date, the minute-by-minute timeline seen in the live snapshots, and
+    imported fixtures/events. It is filled by record_snapshot() on every live=all fetch and by
+    bulk imports of fixtures?date= / fixtures/events dumps, and exports the Timelines dataset
+    that backtest.py replays.
+    """
+    def __init__(self, path, clock=datetime.utcnow):
+        logger.info(f"Opening fixture history at {path}")
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+
+    def _write(self, statements):
+        """Runs [(sql, rows)] as executemany calls in one transaction."""
+        with self._lock:
+            self.conn.execute('BEGIN')
+            try:
+                for sql, rows in statements:
+                    self.conn.executemany(sql, rows)
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def record_snapshot(self, matches, observed_at=None):
+        """Records one live=all response: fixture states and one timeline entry per fixture."""
+        if not matches:
+            return 0
+        observed_at = (observed_at or self._clock()).isoformat()
+        fixtures, timeline = [], []
+        for match in matches:
+            row = _fixture_row(match, observed_at)
+            fixtures.append(row)
+            status, elapsed, home_goals, away_goals = row[11], row[12], row[13], row[14]
+            if status not in STATUS_ORDER or (elapsed is None and status in RUNNING_STATUSES):
+                continue
+            if elapsed is None:
+                elapsed = 0 # HT/FT entries without a minute; the status orders them
+            timeline.append((row[0], status, elapsed, home_goals or 0, away_goals or 0, observed_at))
+        self._write([(UPSERT_FIXTURE, fixtures), (UPSERT_TIMELINE, timeline)])
+        return len(fixtures)
+
+    def import_fixtures(self, document):
+        """Imports a fixtures?date= (or any fixtures endpoint) response: the fixtures' latest state."""
+        observed_at = self._clock().isoformat()
+        rows = [_fixture_row(match, observed_at) for match in _response(document)]
+        self._write([(UPSERT_FIXTURE, rows)])
+        return len(rows)
+
+    def import_events(self, document, fixture_id=None):
+        """Imports a fixtures/events?fixture= response, replacing the fixture's stored events."""
+        if fixture_id is None:
+            fixture_id = ((document.get('parameters') or {}) if isinstance(document, dict) else {}).get('fixture')
+        if fixture_id is None:
+            raise ValueError("Events dump without a fixture ID")
+        rows = [
+            (
+                int(fixture_id), seq, (event.get('time') or {}).get('elapsed'), (event.get('time') or {}).get('extra'),
+                (event.get('team') or {}).get('id'), event.get('type'), event.get('detail'),
+                (event.get('player') or {}).get('name')
+            )
+            for seq, event in enumerate(_response(document))
+        ]
+        self._write([("DELETE FROM events WHERE fixture_id = ?", [(int(fixture_id),)]), ("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)])
+        return len(rows)
+
+    def import_file(self, path):
+        """Imports a JSON dump (optionally .gz), telling events from fixtures by its content."""
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            document = json.load(f)
+        entries = _response(document)
+        parameters = (document.get('parameters') or {}) if isinstance(document, dict) else {}
+        if 'fixture' in parameters or (entries and 'fixture' not in entries[0]):
+            return 'events', self.import_events(document)
+        return 'fixtures', self.import_fixtures(document)
+
+    def fixtures(self, date_from=None, date_to=None, leagues=None):
+        """Fixture rows in a date range (inclusive, YYYY-MM-DD), optionally of some league IDs."""
+        clauses, params = [], []
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(date_to)
+        if leagues:
+            clauses.append(f"league_id IN ({','.join('?' * len(leagues))})")
+            params.extend(leagues)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self.conn.execute(f"SELECT * FROM fixtures{where} ORDER BY date, fixture_id", params).fetchall()
+
+    def _rows_by_fixture(self, sql, fixture_ids):
+        grouped = {}
+        with self._lock:
+            rows = self.conn.execute(sql.format(','.join('?' * len(fixture_ids))), fixture_ids).fetchall()
+        for row in rows:
+            grouped.setdefault(row[0], []).append(tuple(row)[1:])
+        return grouped
+
+    def export_records(self, date_from=None, date_to=None, leagues=None, finished_only=True):
+        """
+        Yields Timelines records (see backtest.py) for the selected fixtures, from the recorded
+        live timeline or, for fixtures never seen live, from their goal events.
+        """
+        fixtures = [
+            fixture for fixture in self.fixtures(date_from, date_to, leagues)
+            if not finished_only or fixture['status'] in FINISHED_STATUSES
+        ]
+        for start in range(0, len(fixtures), EXPORT_BATCH):
+            batch = fixtures[start:start + EXPORT_BATCH]
+            fixture_ids = [fixture['fixture_id'] for fixture in batch]
+            observed = self._rows_by_fixture(
+                "SELECT fixture_id, status, elapsed, home_goals, away_goals FROM timeline WHERE fixture_id IN ({})", fixture_ids
+            )
+            events = self._rows_by_fixture(
+                "SELECT fixture_id, elapsed, extra, team_id, type, detail FROM events WHERE fixture_id IN ({}) ORDER BY fixture_id, seq",
+                fixture_ids
+            )
+            for fixture in batch:
+                fixture_id = fixture['fixture_id']
+                if fixture_id in observed:
+                    timeline = build_timeline(observed[fixture_id], _final_entry(fixture))
+                elif fixture_id in events or (fixture['status'] in FINISHED_STATUSES and not fixture['home_goals'] and not fixture['away_goals']):
+                    # Without events only a goalless fixture's course is known
+                    timeline = timeline_from_events(fixture, events.get(fixture_id, []))
+                else:
+                    continue
+                yield {
+                    'fixture_id': fixture_id, 'league_id': fixture['league_id'], 'league': fixture['league'],
+                    'country': fixture['country'], 'home': fixture['home'], 'away': fixture['away'],
+                    'date': fixture['date'], 'timeline': timeline,
+                }
+
+    def export(self, path, date_from=None, date_to=None, leagues=None):
+        """Writes the selected fixtures as an NDJSON (.gz) dataset for backtest.py."""
+        opener = gzip.open if path.endswith('.gz') else open
+        count = 0
+        with opener(path, 'wt', encoding='utf-8') as f:
+            for record in self.export_records(date_from, date_to, leagues):
+                f.write(json.dumps(record) + '\n')
+                count += 1
+        return count
+
+    def league_stats(self, date_from=None, date_to=None, leagues=None):
+        """Finished fixtures, goals per game, draw and over-2.5 rates per league."""
+        stats = {}
+        for fixture in self.fixtures(date_from, date_to, leagues):
+            if fixture['status'] not in FINISHED_STATUSES:
+                continue
+            entry = stats.setdefault(fixture['league_id'], {'league': fixture['league'], 'country': fixture['country'], 'fixtures': 0, 'goals': 0, 'draws': 0, 'over_2_5': 0})
+            goals = (fixture['home_goals'] or 0) + (fixture['away_goals'] or 0)
+            entry['fixtures'] += 1
+            entry['goals'] += goals
+            entry['draws'] += fixture['home_goals'] == fixture['away_goals']
+            entry['over_2_5'] += goals > 2
+        return stats
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fixture history: import API dumps, export backtest datasets.")
+    parser.add_argument('database', help="SQLite history file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help="Import fixtures?date= / fixtures/events JSON dumps (optionally .gz)")
+    import_parser.add_argument('files', nargs='+')
+    for name, description in (('export', "Write a backtest dataset (NDJSON, .gz to compress)"), ('stats', "Per-league statistics")):
+        command = commands.add_parser(name, help=description)
+        if name == 'export':
+            command.add_argument('output')
+        command.add_argument('--from', dest='date_from', help="First date, YYYY-MM-DD")
+        command.add_argument('--to', dest='date_to', help="Last date, YYYY-MM-DD")
+        command.add_argument('--leagues', help="Comma-separated league IDs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    history = FixtureHistory(args.database)
+    if args.command == 'import':
+        for path in args.files:
+            try:
+                kind, count = history.import_file(path)
+                print(f"{path}: {count} {kind}")
+            except Exception as e:
+                logger.error(f"Could not import {path}: {e}")
+        return
+    leagues = [int(league_id) for league_id in args.leagues.split(',')] if args.leagues else None
+    if args.command == 'export':
+        count = history.export(args.output, args.date_from, args.date_to, leagues)
+        print(f"{count} fixtures exported to {args.output}")
+        return
+    print(f"{'league':<40} {'fixtures':>8} {'goals/game':>10} {'draws':>7} {'over 2.5':>8}")
+    stats = history.league_stats(args.date_from, args.date_to, leagues)
+    for league_id, entry in sorted(stats.items(), key=lambda item: -item[1]['fixtures']):
+        fixtures = entry['fixtures']
+        league = f"{entry['league']} ({league_id})"
+        print(
+            f"{league:<40} {fixtures:>8} {entry['goals'] / fixtures:>10.2f} "
+            f"{100 * entry['draws'] / fixtures:>6.1f}% {100 * entry['over_2_5'] / fixtures:>7.1f}%"
+        )
+
+if __name__ == "__main__":
+    main()
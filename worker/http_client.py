@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 15
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = [500, 502, 503, 504] # 429 is handled by the caller, not retried blindly
+
+class HostStats:
+    """Request, handshake and latency counters for one host."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.handshakes = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record_handshake(self):
+        with self._lock:
+            self.handshakes += 1
+
+    def record_request(self, latency, failed=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1 if failed else 0
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'handshakes': self.handshakes,
+                'avg_latency_ms': round(1000 * self.total_latency / self.requests, 1) if self.requests else 0.0,
+                'max_latency_ms': round(1000 * self.max_latency, 1),
+            }
+
+def _counting_pool(pool_class, stats):
+    """Connection pool class that counts every new (TCP + TLS) connection it opens."""
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            stats.record_handshake()
+            return super()._new_conn()
+    return CountingPool
+
+class _HostAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report new connections to the host's stats."""
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self._stats),
+            'https': _counting_pool(HTTPSConnectionPool, self._stats),
+        }
+
+class HttpClient:
+    """
+    Shared HTTP layer: one keep-alive requests.Session per host, with a bounded connection
+    pool, default timeouts and a retry adapter for connection errors and 5xx responses.
+    """
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stats = {}
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                stats = self._stats.setdefault(host, HostStats())
+                # Status retries only apply to idempotent methods, so a POST is never re-sent after a 5xx
+                retry = Retry(
+                    total=self.retries,
+                    backoff_factor=RETRY_BACKOFF_FACTOR,
+                    status_forcelist=RETRY_STATUSES,
+                    respect_retry_after_header=False,
+                    raise_on_status=False,
+                )
+                adapter = _HostAdapter(
+                    stats, pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry
+                )
+                session = requests.Session()
+                session.mount(f"https://{host}", adapter)
+                session.mount(f"http://{host}", adapter)
+                self._sessions[host] = session
+            return session
+
+    def request(self, method, url, **kwargs):
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._stats[host].record_request(time.monotonic() - started, failed=True)
+            raise
+        self._stats[host].record_request(time.monotonic() - started, failed=response.status_code >= 400)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """Per-host counters: requests, errors, handshakes and average/max latency."""
+        with self._lock:
+            hosts = dict(self._stats)
+        return {host: stats.as_dict() for host, stats in hosts.items()}
+
+    def log_stats(self):
+        for host, stats in self.stats().items():
+            logger.info(
+                f"HTTP {host}: {stats['requests']} requests, {stats['handshakes']} handshakes, "
+                f"{stats['errors']} errors, avg {stats['avg_latency_ms']}ms, max {stats['max_latency_ms']}ms"
+            )
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
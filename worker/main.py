@@ -1,20 +1,19 @@
-from bot import run_bot_once
-import time
+from bot import run_bot_once, next_poll_interval, next_poll_wakeup, resume_pending_notifications
+from runner import FixedRateRunner
 from datetime import datetime
 
-CHECK_INTERVAL = 90  # in seconds
+def log_error(e):
+    print(f"[{datetime.now()}] ❌ Unexpected error in main loop: {e}")
 
 def main():
     print("🚀 Bot worker started")
+    # Alerts committed by a previous run but never confirmed by Telegram
+    resume_pending_notifications()
 
-    while True:
-        try:
-            run_bot_once()
-        except Exception as e:
-            print(f"[{datetime.now()}] ❌ Unexpected error in main loop: {e}")
-        finally:
-            print(f"[{datetime.now()}] 💤 Sleeping for {CHECK_INTERVAL} seconds...\n")
-            time.sleep(CHECK_INTERVAL)
+    # Cycles start on a fixed cadence (adaptive to the strategy windows and the remaining
+    # API quota), or exactly when a fixture enters a window; the runner logs cycle
+    # duration, lag and overruns
+    FixedRateRunner(run_bot_once, next_poll_interval, on_error=log_error, wakeup_fn=next_poll_wakeup).run_forever()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,478 @@
+import hashlib
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+import requests
+from rate_limit import TokenBucket
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+TELEGRAM_API_URL = 'https://api.telegram.org'
+DEFAULT_MAX_RETRIES = 3
+SEND_TIMEOUT = 10
+REQUEUE_DELAY = 30 # A keyed message that failed all its attempts is tried again after this many seconds
+MAX_REQUEUES = 5 # ... this many times; it then stays pending in the outbox until the bot re-scans it
+GLOBAL_MESSAGES_PER_SECOND = 30 # Bot API limit across all chats
+GROUP_MESSAGES_PER_MINUTE = 20 # Bot API limit per group chat
+PRIVATE_MESSAGES_PER_SECOND = 1 # Bot API limit per private chat
+CHAT_BURST = 3 # Messages a chat bucket lets through back-to-back before pacing kicks in
+DEFAULT_RETRY_AFTER = 5
+MAX_THROTTLED_RETRIES = 5 # 429s honoured per message on top of the regular attempts
+MESSAGE_LIMIT = 4096 # Max characters in one Telegram message
+DIGEST_SECTIONS = [ # (group, title) in the order they appear in a digest
+    ('placed', '🎯 Bets placed'),
+    ('win', '🎉 Wins'),
+    ('loss', '🔁 Losses'),
+    ('other', '📣 Alerts'),
+]
+
+class TelegramOutbox:
+    """
+    In-process Telegram outbox. Messages are put on a queue and sent by a dedicated
+    background thread with retries and exponential backoff, so strategy evaluation never
+    waits on the Telegram API. Queue depth and per-message send latency are tracked.
+    Messages submitted with an idempotency key are sent at most once per process, and
+    `on_delivered(key)` is called once Telegram accepted them so the durable outbox entry
+    can be marked as delivered. A key whose message was given up on is released, so a
+    later re-scan of the outbox can submit it again.
+    Sends are paced ahead of time by a global and a per-chat token bucket sized to the Bot
+    API limits, and a 429 waits exactly `parameters.retry_after` seconds before the retry.
+    """
+    def __init__(self, http_client, token, chat_id, max_retries=DEFAULT_MAX_RETRIES, sleep=time.sleep,
+                 on_delivered=None):
+        self.http_client = http_client
+        self.token = token
+        self.chat_id = chat_id
+        self.max_retries = max_retries
+        self.on_delivered = on_delivered
+        self._sleep = sleep
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._keys = set() # Keys queued or delivered by this process
+        self._global_bucket = TokenBucket(GLOBAL_MESSAGES_PER_SECOND, GLOBAL_MESSAGES_PER_SECOND)
+        self._chat_buckets = {}
+        self.throttled = 0 # 429 responses received
+        self.throttled_wait = 0.0 # seconds spent honouring retry_after
+        self.paced_wait = 0.0 # seconds spent waiting on the token buckets
+        self.sent = 0
+        self.failed = 0
+        self.total_latency = 0.0 # enqueue -> delivered
+        self.max_latency = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+                self._thread.start()
+
+    def submit(self, text, key=None):
+        """
+        Queues a message for the sender thread and returns immediately. Returns False if a
+        message with the same key was already queued or delivered.
+        """
+        if key is not None:
+            with self._lock:
+                if key in self._keys:
+                    return False
+                self._keys.add(key)
+        self._put(text, [key] if key is not None else [])
+        return True
+
+    def submit_digest(self, notifications):
+        """
+        Queues a batch of alerts ({'key', 'text', 'event', 'outcome'}) as digests: grouped into
+        bets placed, wins and losses, packed into as few messages as fit Telegram's limit.
+        Alerts whose key was already queued or delivered are left out. Returns the number of
+        messages queued.
+        """
+        with self._lock:
+            fresh = [n for n in notifications if n['key'] not in self._keys]
+            self._keys.update(n['key'] for n in fresh)
+        digests = build_digests(fresh)
+        for text, keys in digests:
+            self._put(text, keys)
+        if digests:
+            logger.info(f"Queued {len(fresh)} alerts as {len(digests)} digest messages")
+        return len(digests)
+
+    def _put(self, text, keys):
+        self.start()
+        self._queue.put({'text': text, 'keys': keys, 'enqueued_at': time.monotonic(), 'requeues': 0})
+
+    def submit_job(self, job):
+        """Runs `job()` on the sender thread, after the messages queued before it."""
+        self.start()
+        self._queue.put({'job': job})
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            if 'job' in message:
+                try:
+                    message['job']()
+                except Exception as e:
+                    logger.error(f"Telegram sender job error: {e}")
+                finally:
+                    self._queue.task_done()
+                continue
+            try:
+                delivered = self.deliver(message['text'])
+            except Exception as e:
+                logger.error(f"Telegram sender error: {e}")
+                delivered = False
+            try:
+                if delivered and self.on_delivered:
+                    for key in message['keys']:
+                        self.on_delivered(key)
+            except Exception as e:
+                logger.error(f"Telegram delivery callback error: {e}")
+            finally:
+                self._record(message, delivered)
+                self._queue.task_done()
+
+    def _requeue(self, message):
+        """Tries a keyed message again later instead of dropping it."""
+        message['requeues'] += 1
+        timer = threading.Timer(REQUEUE_DELAY, self._queue.put, args=(message,))
+        timer.daemon = True
+        timer.start()
+
+    def _chat_bucket(self, chat_id):
+        with self._lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                # Group and channel IDs are negative
+                if str(chat_id).startswith('-'):
+                    bucket = TokenBucket(GROUP_MESSAGES_PER_MINUTE / 60, CHAT_BURST)
+                else:
+                    bucket = TokenBucket(PRIVATE_MESSAGES_PER_SECOND, CHAT_BURST)
+                self._chat_buckets[chat_id] = bucket
+            return bucket
+
+    def _pace(self, chat_id):
+        """Blocks the sender thread until both the chat and the global budget allow a message."""
+        waited = self._chat_bucket(chat_id).acquire(sleep=self._sleep)
+        waited += self._global_bucket.acquire(sleep=self._sleep)
+        if waited:
+            with self._lock:
+                self.paced_wait += waited
+
+    def _throttle(self, chat_id, response):
+        """Honours a 429: waits retry_after seconds and empties the chat's bucket."""
+        retry_after = _retry_after(response)
+        self._chat_bucket(chat_id).limit_tokens(0)
+        with self._lock:
+            self.throttled += 1
+            self.throttled_wait += retry_after
+        logger.warning(f"Telegram rate limited chat {chat_id}. Retrying in {retry_after} seconds")
+        self._sleep(retry_after)
+
+    def call(self, method, data):
+        """
+        Calls a Bot API method synchronously, paced and with retries.
+        Returns the decoded response body once Telegram answered ('ok' is False for a
+        rejected request, which is not retried), or None if every attempt failed.
+        """
+        url = f"{TELEGRAM_API_URL}/bot{self.token}/{method}"
+        chat_id = data.get('chat_id', self.chat_id)
+        attempt = 0
+        throttled = 0
+        while attempt < self.max_retries:
+            self._pace(chat_id)
+            try:
+                response = self.http_client.post(url, data=data, timeout=SEND_TIMEOUT)
+                if response.status_code == 200:
+                    return _json(response) or {'ok': True}
+                if response.status_code == 429 and throttled < MAX_THROTTLED_RETRIES:
+                    # Not a failed attempt: Telegram told us exactly when to come back
+                    throttled += 1
+                    self._throttle(chat_id, response)
+                    continue
+                if 400 <= response.status_code < 500:
+                    logger.error(f"Telegram rejected {method}: {response.status_code} - {response.text}")
+                    return _json(response) or {'ok': False, 'description': response.text}
+                logger.error(f"Telegram error (attempt {attempt + 1}): {response.status_code} - {response.text}")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Network Error calling Telegram {method} (attempt {attempt + 1}): {e}")
+
+            attempt += 1
+            if attempt < self.max_retries:
+                self._sleep(2 ** (attempt - 1))
+        return None
+
+    def deliver(self, text):
+        """Sends one message synchronously with retries. Returns True once Telegram accepted it."""
+        result = self.call('sendMessage', {'chat_id': self.chat_id, 'text': text})
+        return bool(result and result.get('ok'))
+
+    def _record(self, message, delivered):
+        latency = time.monotonic() - message['enqueued_at']
+        with self._lock:
+            if delivered:
+                self.sent += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+                return
+            self.failed += 1
+        keys = ', '.join(message['keys'])
+        if message['keys'] and message['requeues'] < MAX_REQUEUES:
+            logger.warning(f"Telegram message {keys} not delivered, retrying in {REQUEUE_DELAY}s")
+            self._requeue(message)
+        elif message['keys']:
+            # Left undelivered in the outbox; released so the bot's periodic re-scan can submit it again
+            with self._lock:
+                self._keys.difference_update(message['keys'])
+            logger.error(f"Telegram message {keys} still not delivered after {MAX_REQUEUES} requeues")
+        else:
+            logger.error(f"Telegram message dropped after {self.max_retries} attempts: {message['text'][:80]}")
+
+    def drain(self, timeout=None):
+        """Blocks until every queued message has been handled (or `timeout` seconds passed)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'sent': self.sent,
+                'failed': self.failed,
+                'avg_latency_ms': round(1000 * self.total_latency / self.sent, 1) if self.sent else 0.0,
+                'max_latency_ms': round(1000 * self.max_latency, 1),
+                'throttled': self.throttled,
+                'throttled_wait_s': round(self.throttled_wait, 1),
+                'paced_wait_s': round(self.paced_wait, 1),
+            }
+
+class StatusBoard:
+    """
+    One pinned Telegram message per day listing the open and settled bets, edited in place
+    with editMessageText instead of sending a message per alert. The board is re-rendered
+    from the alerts of each cycle and only edited when its content hash changed. Its message
+    ID, hash and entries are kept in storage through `load(day)` / `save(day, board)`, so a
+    restart keeps editing the same message. Refreshes run on the outbox's sender thread
+    (request_refresh), so the bot cycle never waits on Telegram.
+    """
+    def __init__(self, outbox, load, save, on_delivered=None, clock=datetime.utcnow):
+        self.outbox = outbox
+        self._load = load
+        self._save = save
+        self.on_delivered = on_delivered
+        self._clock = clock
+        self._lock = threading.Lock() # add() runs on the cycle thread, refresh() on the sender thread
+        self._refresh_queued = False
+        self.day = None
+        self.message_id = None
+        self.hash = None
+        self.entries = {} # "<fixture_id>-<bet_type>" -> {'status': 'open'|'win'|'loss', 'text'}
+        self._pending = [] # Alerts ({'key', 'text', 'bet_key'}) delivered once the next edit succeeds
+        self.edits = 0
+        self.unchanged = 0
+
+    def add(self, notifications):
+        """Records a batch of alerts ({'key', 'text', 'fixture_id', 'bet_type', 'event', 'outcome'})."""
+        with self._lock:
+            self._roll_over()
+            pending_keys = {entry['key'] for entry in self._pending}
+            for notification in notifications:
+                bet_key = f"{notification.get('fixture_id')}-{notification.get('bet_type')}"
+                status = 'open' if notification.get('event') == 'placed' else notification.get('outcome') or 'settled'
+                current = self.entries.get(bet_key)
+                # A late 'placed' alert (e.g. resumed after a restart) never reopens a settled bet
+                if not (current and current['status'] != 'open' and status == 'open'):
+                    self.entries[bet_key] = {'status': status, 'text': notification['text']}
+                # Re-scans of the outbox hand over alerts already waiting for the next edit again
+                if notification['key'] not in pending_keys:
+                    pending_keys.add(notification['key'])
+                    self._pending.append({'key': notification['key'], 'text': notification['text'], 'bet_key': bet_key})
+
+    def _roll_over(self):
+        """Starts a new board at 00:00 UTC, carrying over the bets that are still open."""
+        day = self._clock().strftime('%Y-%m-%d')
+        if day == self.day:
+            return
+        board = self._load(day)
+        if board is None:
+            previous = self.entries if self.day else (
+                self._load((self._clock() - timedelta(days=1)).strftime('%Y-%m-%d')) or {}
+            ).get('entries', {})
+            board = {'entries': {key: entry for key, entry in previous.items() if entry['status'] == 'open'}}
+        self.day = day
+        self.message_id = board.get('message_id')
+        self.hash = board.get('hash')
+        self.entries = dict(board.get('entries', {}))
+
+    def render(self):
+        """Board text and the keys of the entries it shows; entries past Telegram's limit are cut."""
+        open_bets = [(key, entry) for key, entry in self.entries.items() if entry['status'] == 'open']
+        settled = [(key, entry) for key, entry in self.entries.items() if entry['status'] != 'open']
+        outcomes = {outcome: sum(1 for _, entry in settled if entry['status'] == outcome) for outcome in ('win', 'loss', 'push')}
+        summary = f"{outcomes['win']} won, {outcomes['loss']} lost"
+        if outcomes['push']:
+            summary += f", {outcomes['push']} pushed"
+        lines = [(None, f"📋 Bets board {self.day}"), (None, ''), (None, f"⏳ Open ({len(open_bets)})")]
+        lines += [(key, ' | '.join(entry['text'].splitlines())) for key, entry in open_bets]
+        lines += [(None, ''), (None, f"🏁 Settled ({len(settled)}): {summary}")]
+        lines += [(key, ' | '.join(entry['text'].splitlines())) for key, entry in settled]
+        text, shown = '', set()
+        for index, (key, line) in enumerate(lines):
+            more = f"… and {len(lines) - index} more lines"
+            if len(text) + len(line) + 1 > MESSAGE_LIMIT - len(more) - 1:
+                return f"{text}\n{more}", shown
+            text = f"{text}\n{line}" if text else line
+            if key is not None:
+                shown.add(key)
+        return text, shown
+
+    def request_refresh(self):
+        """Queues a refresh on the sender thread, unless one is already waiting there."""
+        with self._lock:
+            if self._refresh_queued:
+                return False
+            self._refresh_queued = True
+        self.outbox.submit_job(self._queued_refresh)
+        return True
+
+    def _queued_refresh(self):
+        with self._lock:
+            self._refresh_queued = False
+        self.refresh()
+
+    def refresh(self):
+        """
+        Edits (or, on a new day, sends and pins) the board if its content changed. Blocks on
+        the Telegram API, so the bot calls it through request_refresh().
+        """
+        with self._lock:
+            self._roll_over()
+            if not self.entries and self.message_id is None:
+                return False
+            text, shown = self.render()
+            content_hash = hashlib.sha1(text.encode('utf-8')).hexdigest()
+            unchanged = content_hash == self.hash
+            if unchanged:
+                self.unchanged += 1
+            day, message_id = self.day, self.message_id
+            pending, self._pending = self._pending, []
+        if unchanged:
+            self._mark_delivered(pending, shown)
+            return False
+        result, message_id = self._publish(text, message_id)
+        with self._lock:
+            if not (result and result.get('ok')):
+                # Shown on the board by a later refresh
+                self._pending = pending + self._pending
+                if result and day == self.day and self.message_id is not None:
+                    # The board was deleted or is too old to edit; post a new one next time
+                    logger.warning(f"Status board {self.message_id} could not be edited, starting a new one")
+                    self.message_id = None
+                    self.hash = None
+                return False
+            self.edits += 1
+            board = None
+            if day == self.day:
+                self.message_id = message_id
+                self.hash = content_hash
+                board = {'message_id': self.message_id, 'hash': self.hash, 'entries': dict(self.entries)}
+        if board is not None:
+            self._save(day, board)
+        self._mark_delivered(pending, shown)
+        return True
+
+    def _publish(self, text, message_id):
+        """Edits the board message, or sends and pins a new one. Returns (result, message ID)."""
+        chat_id = self.outbox.chat_id
+        if message_id is not None:
+            result = self.outbox.call('editMessageText', {'chat_id': chat_id, 'message_id': message_id, 'text': text})
+            if result and not result.get('ok') and 'message is not modified' in result.get('description', ''):
+                result = {'ok': True}
+            return result, message_id
+        result = self.outbox.call('sendMessage', {'chat_id': chat_id, 'text': text})
+        if result and result.get('ok'):
+            message_id = result['result']['message_id']
+            self.outbox.call('pinChatMessage', {
+                'chat_id': chat_id, 'message_id': message_id, 'disable_notification': True
+            })
+        return result, message_id
+
+    def _mark_delivered(self, pending, shown):
+        """
+        Marks the alerts whose bet is on the board as delivered. Alerts cut from a full board
+        are sent as messages of their own instead, and marked once Telegram accepted them.
+        """
+        for notification in pending:
+            if notification['bet_key'] not in shown:
+                self.outbox.submit(notification['text'], key=notification['key'])
+            elif self.on_delivered:
+                self.on_delivered(notification['key'])
+
+    def stats(self):
+        with self._lock:
+            return {'day': self.day, 'message_id': self.message_id, 'entries': len(self.entries),
+                    'edits': self.edits, 'unchanged': self.unchanged}
+
+def _digest_group(notification):
+    if notification.get('event') == 'placed':
+        return 'placed'
+    if notification.get('outcome') in ('win', 'loss'):
+        return notification['outcome']
+    return 'other'
+
+def build_digests(notifications, limit=MESSAGE_LIMIT):
+    """
+    Packs alerts into as few messages of at most `limit` characters as possible, one section
+    per group. Returns a list of (text, keys) pairs, `keys` being the alerts each message carries.
+    """
+    by_group = {}
+    for notification in notifications:
+        by_group.setdefault(_digest_group(notification), []).append(notification)
+    digests = []
+    text, keys = '', []
+    for group, title in DIGEST_SECTIONS:
+        entries = by_group.get(group)
+        if not entries:
+            continue
+        header = f"{title} ({len(entries)})"
+        for index, notification in enumerate(entries):
+            # Room for the longest section header
+            block = notification['text'][:limit - len(title) - 16]
+            if index == 0:
+                addition = f"{header}\n\n{block}"
+            else:
+                addition = block
+            separator = '\n\n' if text else ''
+            if text and len(text) + len(separator) + len(addition) > limit:
+                digests.append((text, keys))
+                text, keys, separator = '', [], ''
+                if index > 0:
+                    addition = f"{title} (cont.)\n\n{block}"
+            text += separator + addition
+            keys.append(notification['key'])
+    if text:
+        digests.append((text, keys))
+    return digests
+
+def _json(response):
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+def _retry_after(response):
+    """Seconds to wait after a 429, from `parameters.retry_after` (or the Retry-After header)."""
+    retry_after = (_json(response) or {}).get('parameters', {}).get('retry_after')
+    if retry_after is None:
+        retry_after = response.headers.get('Retry-After')
+    try:
+        return max(int(retry_after), 1)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
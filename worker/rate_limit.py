@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+DEFAULT_REQUESTS_PER_MINUTE = 30 # Until API-Football tells us the real per-minute limit
+DEFAULT_MAX_WAIT = 10 # Longest we pace a request before skipping it for this cycle
+DEFAULT_RETRY_AFTER = 60
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def configure(self, rate, capacity):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.capacity = capacity
+            self.tokens = min(self.tokens, capacity)
+
+    def limit_tokens(self, tokens):
+        """Caps the available tokens, e.g. to what the server says is really left."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, tokens)
+
+    def wait_time(self, tokens=1):
+        """Seconds until `tokens` are available (0 if they are available now)."""
+        with self._lock:
+            self._refill()
+            missing = tokens - self.tokens
+            return max(0.0, missing / self.rate) if self.rate > 0 else (0.0 if missing <= 0 else float('inf'))
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, max_wait=None, sleep=time.sleep):
+        """
+        Takes `tokens`, sleeping until they are available. Returns the seconds waited,
+        or None without taking anything if that would mean waiting longer than `max_wait`.
+        """
+        waited = 0.0
+        while not self.try_acquire(tokens):
+            delay = self.wait_time(tokens)
+            if max_wait is not None and waited + delay > max_wait:
+                return None
+            sleep(delay)
+            waited += delay
+        return waited
+
+class ApiRateLimiter:
+    """
+    Paces API-Football requests ahead of time instead of reacting to 429s.
+    The per-minute token bucket and the daily quota are kept in sync with the
+    X-RateLimit-* and x-ratelimit-requests-* headers of every response.
+    """
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, max_wait=DEFAULT_MAX_WAIT,
+                 clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(requests_per_minute / 60, requests_per_minute, clock=clock)
+        self.daily_limit = None
+        self.daily_remaining = None
+        self.quota_day = None # UTC date the daily figures belong to; the quota resets at 00:00 UTC
+        self.blocked_until = 0.0
+        self.throttled = 0 # 429 responses received
+        self.skipped = 0 # requests not made because the budget was exhausted
+
+    def acquire(self):
+        """Waits for a request slot. Returns False when the request should be skipped this cycle."""
+        blocked_for = self.blocked_until - self._clock()
+        if blocked_for > self.max_wait:
+            self.skipped += 1
+            return False
+        if blocked_for > 0:
+            self._sleep(blocked_for)
+        if self.daily_remaining is not None and self.daily_remaining <= 0:
+            if self.quota_day == datetime.now(timezone.utc).date():
+                self.skipped += 1
+                return False
+            self.daily_remaining = None
+        if self.bucket.acquire(max_wait=self.max_wait, sleep=self._sleep) is None:
+            self.skipped += 1
+            return False
+        return True
+
+    def update(self, status_code, headers):
+        """Syncs the limiter with the rate-limit headers of a response."""
+        minute_limit = _int_header(headers, 'X-RateLimit-Limit')
+        minute_remaining = _int_header(headers, 'X-RateLimit-Remaining')
+        if minute_limit:
+            self.bucket.configure(minute_limit / 60, minute_limit)
+        if minute_remaining is not None:
+            self.bucket.limit_tokens(minute_remaining)
+        daily_limit = _int_header(headers, 'x-ratelimit-requests-limit')
+        daily_remaining = _int_header(headers, 'x-ratelimit-requests-remaining')
+        if daily_limit is not None:
+            self.daily_limit = daily_limit
+        if daily_remaining is not None:
+            self.daily_remaining = daily_remaining
+            self.quota_day = datetime.now(timezone.utc).date()
+        if status_code == 429:
+            self.throttled += 1
+            retry_after = _int_header(headers, 'Retry-After') or DEFAULT_RETRY_AFTER
+            self.blocked_until = self._clock() + retry_after
+            self.bucket.limit_tokens(0)
+            logger.warning(f"API rate limited. Pausing API-Football requests for {retry_after} seconds")
+
+    def poll_interval(self, base_interval, requests_per_cycle=1, now=None):
+        """
+        Polling interval that spreads the remaining daily quota evenly until it resets
+        at 00:00 UTC, and never goes below `base_interval`.
+        """
+        if self.daily_remaining is None:
+            return base_interval
+        now = now or datetime.now(timezone.utc)
+        reset_at = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        cycles_left = self.daily_remaining / max(requests_per_cycle, 1)
+        if cycles_left < 1:
+            return max(base_interval, (reset_at - now).total_seconds())
+        return max(base_interval, (reset_at - now).total_seconds() / cycles_left)
+
+    def status(self):
+        return {
+            'daily_limit': self.daily_limit,
+            'daily_remaining': self.daily_remaining,
+            'minute_tokens': round(self.bucket.tokens, 1),
+            'throttled': self.throttled,
+            'skipped': self.skipped,
+        }
+
+def _int_header(headers, name):
+    value = headers.get(name) if headers else None
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
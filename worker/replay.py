@@ -0,0 +1,184 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+from requests.structures import CaseInsensitiveDict
+from capture import read_capture
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+LIVE_QUERY = 'live=all'
+DRAIN_TIMEOUT = 30 # Seconds to wait for the queued alerts at the end of a replay
+
+class SimulatedClock:
+    """Capture time (seconds since the epoch) for the worker's clocks, moved forward frame by frame."""
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def utcnow(self):
+        return datetime.utcfromtimestamp(self.now)
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def advance_to(self, now):
+        self.now = max(self.now, now)
+
+class CapturedResponse:
+    """The parts of a requests.Response the worker reads."""
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+class ReplayHttpClient:
+    """
+    Fake HTTP layer serving captured responses: the current live=all frame for the live feed,
+    and for fixture lookups the latest captured state of each requested fixture up to the end
+    of the current frame. Telegram calls succeed without leaving the process.
+    """
+    def __init__(self, records):
+        self._lock = threading.Lock()
+        self.frame = None
+        self.frame_end = float('inf')
+        self.fixtures = {} # fixture ID -> [(ts, match)] from fixture lookups
+        for record in records:
+            if LIVE_QUERY in record['url'] or record['status'] != 200:
+                continue
+            try:
+                matches = json.loads(record['body']).get('response', [])
+            except (ValueError, AttributeError):
+                continue
+            for match in matches:
+                self.fixtures.setdefault(str(match['fixture']['id']), []).append((record['ts'], match))
+        self.requests = {}
+        self.telegram = {}
+        self._message_id = 0
+
+    def get(self, url, params=None, **kwargs):
+        path = urlsplit(url).path
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+        if LIVE_QUERY in url:
+            frame = self.frame
+            return CapturedResponse(frame['status'], frame['headers'], frame['body'])
+        params = params or {}
+        fixture_ids = str(params.get('ids') or params.get('id') or '').split('-')
+        matches = []
+        for fixture_id in fixture_ids:
+            states = [match for ts, match in self.fixtures.get(fixture_id, []) if ts < self.frame_end]
+            if states:
+                matches.append(states[-1])
+        return CapturedResponse(200, {}, json.dumps({'response': matches}))
+
+    def post(self, url, data=None, **kwargs):
+        method = url.rsplit('/', 1)[-1]
+        with self._lock:
+            self.telegram[method] = self.telegram.get(method, 0) + 1
+            self._message_id += 1
+            message_id = self._message_id
+        return CapturedResponse(200, {}, json.dumps({'ok': True, 'result': {'message_id': message_id}}))
+
+    def stats(self):
+        return {'api': dict(self.requests), 'telegram': dict(self.telegram)}
+
+    def log_stats(self):
+        logger.info(f"Replay HTTP: {self.stats()}")
+
+def install(bot, records, clock):
+    """Points the worker's HTTP layer and clocks at the capture."""
+    from rate_limit import ApiRateLimiter
+    from scheduler import PollScheduler
+
+    http = ReplayHttpClient(records)
+    bot.http_client = http
+    bot.telegram_outbox.http_client = http
+    bot.api_limiter = ApiRateLimiter(clock=clock.time, sleep=clock.sleep)
+    bot.poll_scheduler = PollScheduler(bot.strategy_engine.windows, idle_interval=bot.SLEEP_TIME, clock=clock.time)
+    bot.state_manager._clock = clock.utcnow
+    bot.status_board._clock = clock.utcnow
+    bot.monotonic = clock.time
+    return http
+
+def replay(bot, records, speed=1.0, clock=None, sleep=time.sleep):
+    """
+    Runs run_bot_once once per captured live=all frame. With `speed` (1 = real time, 10 = ten
+    times faster) cycles start at the frames' captured offsets; speed 0 runs them back to back.
+    Returns cycle timings.
+    """
+    clock = clock or SimulatedClock()
+    http = install(bot, records, clock)
+    frames = [record for record in records if LIVE_QUERY in record['url']]
+    durations, lags, errors = [], [], 0
+    started = time.perf_counter()
+    for index, frame in enumerate(frames):
+        if speed:
+            due = started + (frame['ts'] - frames[0]['ts']) / speed
+            lags.append(max(0.0, time.perf_counter() - due))
+            if due > time.perf_counter():
+                sleep(due - time.perf_counter())
+        clock.advance_to(frame['ts'])
+        http.frame = frame
+        http.frame_end = frames[index + 1]['ts'] if index + 1 < len(frames) else float('inf')
+        cycle_started = time.perf_counter()
+        try:
+            bot.run_bot_once()
+        except Exception as e:
+            errors += 1
+            logger.error(f"Replay cycle {index} failed: {e}", exc_info=e)
+        durations.append(time.perf_counter() - cycle_started)
+    # Alerts are paced at Telegram's real rates, so the queue can take a while to empty
+    bot.telegram_outbox.drain(DRAIN_TIMEOUT)
+    durations.sort()
+    return {
+        'frames': len(frames),
+        'errors': errors,
+        'elapsed_s': round(time.perf_counter() - started, 2),
+        'captured_s': round(frames[-1]['ts'] - frames[0]['ts'], 1) if frames else 0,
+        'cycle_p50_ms': round(1000 * durations[len(durations) // 2], 1) if durations else 0,
+        'cycle_p95_ms': round(1000 * durations[int(len(durations) * 0.95)], 1) if durations else 0,
+        'cycle_max_ms': round(1000 * durations[-1], 1) if durations else 0,
+        'max_lag_ms': round(1000 * max(lags), 1) if lags else 0,
+        **http.stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured API responses through run_bot_once.")
+    parser.add_argument('capture', help="Capture file or CAPTURE_PATH directory")
+    parser.add_argument('--speed', type=float, default=1.0, help="1 = real time, 10 = ten times faster, 0 = as fast as possible")
+    args = parser.parse_args()
+
+    # The worker is configured from the environment when imported: replay against in-memory
+    # storage, without capturing or recording the replayed feed again
+    os.environ.pop('CAPTURE_PATH', None)
+    os.environ.pop('HISTORY_DB_PATH', None)
+    os.environ['STORAGE_BACKEND'] = os.getenv('REPLAY_STORAGE_BACKEND', 'memory')
+    os.environ.setdefault('API_KEY', 'replay')
+    os.environ['TELEGRAM_TOKEN'] = 'replay'
+    os.environ['TELEGRAM_CHAT_ID'] = os.getenv('TELEGRAM_CHAT_ID') or '1'
+    import bot
+
+    records = read_capture(args.capture)
+    stats = replay(bot, records, speed=args.speed)
+    backend = bot.state_manager.backend
+    if backend:
+        stats['bets'] = {
+            'unresolved': len(backend.stream('unresolved_bets')),
+            'resolved': len(backend.stream('resolved_bets')),
+        }
+    stats['outbox'] = bot.telegram_outbox.stats()
+    print(json.dumps({'records': len(records), **stats}, indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import logging
+import time
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+OVERRUN_MERGE = 'merge' # An overrunning cycle is followed immediately by the late slot
+OVERRUN_SKIP = 'skip' # An overrunning cycle gives up the late slot and waits for the next one
+
+class FixedRateRunner:
+    """
+    Runs `cycle` on a steady cadence. Each start is scheduled from the previous scheduled
+    start plus `interval_fn()`, not from when the previous cycle ended, so the period does
+    not drift with cycle duration. A cycle that runs past the next slot is an overrun: slots
+    it swallowed entirely are skipped and counted, and the late slot is either run at once
+    (OVERRUN_MERGE) or skipped too (OVERRUN_SKIP). Overruns are only ever counted against
+    this cadence. `wakeup_fn`, if given, returns seconds from the end of a cycle until an
+    exact wake-up (or None), which brings the next start forward without moving the cadence.
+    """
+    def __init__(self, cycle, interval_fn, on_error=None, overrun_policy=OVERRUN_MERGE,
+                 wakeup_fn=None, clock=time.monotonic, sleep=time.sleep):
+        self.cycle = cycle
+        self.interval_fn = interval_fn
+        self.wakeup_fn = wakeup_fn
+        self.on_error = on_error
+        self.overrun_policy = overrun_policy
+        self._clock = clock
+        self._sleep = sleep
+        self.next_start = None
+        self.cycles = 0
+        self.overruns = 0
+        self.skipped_slots = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def run_once(self):
+        """Waits for the next slot, runs one cycle and schedules the following slot."""
+        if self.next_start is None:
+            self.next_start = self._clock()
+        now = self._clock()
+        if now < self.next_start:
+            self._sleep(self.next_start - now)
+            now = self._clock()
+        lag = now - self.next_start
+        try:
+            self.cycle()
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            self.on_error(e)
+        finally:
+            end = self._clock()
+            self._record(end - now, lag)
+            self._schedule_next(end)
+
+    def _record(self, duration, lag):
+        self.cycles += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+
+    def _schedule_next(self, end):
+        interval = max(self.interval_fn(), 0.001)
+        self.next_start += interval
+        if end > self.next_start:
+            self.overruns += 1
+            overshoot = end - self.next_start
+            missed = int(overshoot // interval)
+            if self.overrun_policy == OVERRUN_SKIP:
+                missed += 1
+            self.skipped_slots += missed
+            self.next_start += missed * interval
+            logger.warning(
+                f"Cycle overran its {interval:.0f}s slot by {overshoot:.1f}s; {missed} slot(s) skipped"
+            )
+        wakeup = self.wakeup_fn() if self.wakeup_fn else None
+        if wakeup is not None:
+            self.next_start = min(self.next_start, end + max(wakeup, 0.0))
+        logger.info(
+            f"Cycle {self.cycles}: duration {self.last_duration:.1f}s, lag {self.last_lag:.1f}s, "
+            f"next in {max(0.0, self.next_start - end):.0f}s, overruns {self.overruns}, skipped {self.skipped_slots}"
+        )
+
+    def metrics(self):
+        return {
+            'cycles': self.cycles,
+            'last_duration': round(self.last_duration, 3),
+            'max_duration': round(self.max_duration, 3),
+            'last_lag': round(self.last_lag, 3),
+            'max_lag': round(self.max_lag, 3),
+            'overruns': self.overruns,
+            'skipped_slots': self.skipped_slots,
+        }
+
+    def run_forever(self):
+        while True:
+            self.run_once()
@@ -0,0 +1,152 @@
+import logging
+import time
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+FAST_POLL_INTERVAL = 15 # A fixture is inside a strategy window
+IDLE_POLL_INTERVAL = 90 # Nothing known about the feed (no live fixtures or a failed fetch)
+MAX_POLL_INTERVAL = 300 # Longest sleep, so newly kicked-off fixtures are still picked up early
+MIN_POLL_INTERVAL = 1 # Shortest sleep when waking up exactly as a fixture enters a window
+HALFTIME_MINUTE = 45
+STATUS_HALFTIME = 'HT'
+RUNNING_STATUSES = {'1H': 0, '2H': HALFTIME_MINUTE} # Status -> minute the period's clock starts from
+
+class MatchClock:
+    """
+    Per-fixture clock model. Estimates the current match minute at any moment from the feed's
+    `periods.first` / `periods.second` kickoff timestamps and the wall clock, calibrated
+    against the `elapsed` values the feed reports. Without kickoff timestamps it extrapolates
+    from the last observed `elapsed`.
+    """
+    def __init__(self):
+        self.status = None
+        self.elapsed = None
+        self.observed_at = None
+        self.kickoff = None
+        self.offset = 0
+
+    def update(self, status, elapsed, periods, observed_at):
+        status = (status or '').upper()
+        periods = periods or {}
+        kickoff = periods.get('second') if status == '2H' else periods.get('first') if status == '1H' else None
+        if status != self.status or kickoff != self.kickoff:
+            self.offset = None
+        self.status = status
+        self.elapsed = elapsed
+        self.observed_at = observed_at
+        self.kickoff = kickoff
+        if kickoff and elapsed is not None and status in RUNNING_STATUSES:
+            # Feed minute vs. wall-clock minute since kickoff; keep the largest seen so estimates err early
+            offset = elapsed - (RUNNING_STATUSES[status] + int((observed_at - kickoff) // 60))
+            self.offset = offset if self.offset is None else max(self.offset, offset)
+        else:
+            self.offset = 0
+
+    @property
+    def running(self):
+        return self.status in RUNNING_STATUSES and self.elapsed is not None
+
+    def minute_at(self, now):
+        """Estimated match minute at wall-clock time `now`."""
+        if not self.running:
+            return self.elapsed
+        if self.kickoff:
+            return RUNNING_STATUSES[self.status] + int((now - self.kickoff) // 60) + self.offset
+        return self.elapsed + int((now - self.observed_at) // 60)
+
+    def time_of_minute(self, minute):
+        """Earliest wall-clock time at which the clock reaches `minute` (None if not running)."""
+        if not self.running:
+            return None
+        if self.kickoff:
+            return self.kickoff + (minute - RUNNING_STATUSES[self.status] - self.offset) * 60
+        # The observed minute may have started up to 59s before we saw it
+        return self.observed_at + (minute - self.elapsed - 1) * 60
+
+class PollScheduler:
+    """
+    Predicts, from each fixture's clock, when it next enters a strategy window or reaches HT
+    with a pending bet, and turns that into the next polling interval: fast while a fixture is
+    inside a window, waking exactly when the next one enters, slower when nothing is close.
+    `windows` is a list of (status, minutes) pairs, e.g. [('1H', [35, 36, 37])].
+    """
+    def __init__(self, windows, fast_interval=FAST_POLL_INTERVAL, idle_interval=IDLE_POLL_INTERVAL,
+                 max_interval=MAX_POLL_INTERVAL, clock=time.time):
+        self.windows = [(status, min(minutes), max(minutes)) for status, minutes in windows]
+        self.fast_interval = fast_interval
+        self.idle_interval = idle_interval
+        self.max_interval = max_interval
+        self._clock = clock
+        self.clocks = {} # fixture ID -> MatchClock, for the fixtures of the latest snapshot
+        self._pending = set()
+        self._observed = False
+
+    def observe(self, live_matches, pending_fixture_ids=()):
+        """Updates the fixture clocks from the latest snapshot."""
+        now = self._clock()
+        clocks = {}
+        for match in live_matches:
+            fixture = match['fixture']
+            fixture_id = str(fixture['id'])
+            match_clock = self.clocks.get(fixture_id) or MatchClock()
+            match_clock.update(fixture['status']['short'], fixture['status']['elapsed'], fixture.get('periods'), now)
+            clocks[fixture_id] = match_clock
+        self.clocks = clocks
+        self._pending = {str(fixture_id) for fixture_id in pending_fixture_ids}
+        self._observed = bool(live_matches)
+
+    def seconds_until_event(self, fixture_id, now):
+        """
+        Seconds until the fixture next needs attention: 0 while it is inside a window (or at HT
+        with a pending bet), None if nothing more can happen for it.
+        """
+        match_clock = self.clocks[fixture_id]
+        has_pending_bet = fixture_id in self._pending
+        if match_clock.status == STATUS_HALFTIME:
+            return 0 if has_pending_bet else None
+        if not match_clock.running:
+            return None
+        minute = match_clock.minute_at(now)
+        targets = [
+            first for status, first, last in self.windows
+            if status == match_clock.status and minute <= last
+        ]
+        if has_pending_bet and match_clock.status == '1H':
+            targets.append(HALFTIME_MINUTE)
+        if not targets:
+            return None
+        return max(0, match_clock.time_of_minute(min(targets)) - now)
+
+    def _next_event(self):
+        """Seconds until the earliest fixture needs attention, None if none will."""
+        now = self._clock()
+        events = [
+            seconds for seconds in (self.seconds_until_event(fixture_id, now) for fixture_id in self.clocks)
+            if seconds is not None
+        ]
+        return min(events) if events else None
+
+    def next_interval(self):
+        """
+        Cadence of the polls, i.e. seconds between two poll starts: fast while a fixture is
+        inside a window, slow otherwise (next_wakeup() then says when to poll early).
+        """
+        if not self._observed:
+            return self.idle_interval
+        next_event = self._next_event()
+        if next_event is not None and next_event <= 0:
+            return self.fast_interval
+        return self.max_interval
+
+    def next_wakeup(self):
+        """
+        Seconds from now until the earliest fixture reaches its window, so the poll can happen
+        exactly then. None while a fixture is already inside one or nothing is coming up.
+        """
+        if not self._observed:
+            return None
+        next_event = self._next_event()
+        if next_event is None or next_event <= 0:
+            return None
+        return min(self.max_interval, max(MIN_POLL_INTERVAL, next_event))
@@ -0,0 +1,386 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+STALE_BET_MINUTES = 20 # FT bets placed longer ago than this are looked up once their fixture left the live feed
+
+class StateManager:
+    """
+    Manages the bot's persisted state (tracked matches, unresolved and resolved bets and the
+    notification outbox) on top of a pluggable StorageBackend, with a per-cycle read index
+    and write-behind buffer.
+    """
+    def __init__(self, backend, clock=datetime.utcnow):
+        self.backend = backend
+        self._clock = clock # UTC now; simulated in backtests
+        # In-memory index of the unresolved_bets collection, keyed by fixture ID.
+        # Loaded once per cycle by load_unresolved_bets() and kept in sync by our own writes.
+        self._unresolved_bets = None
+        self._unresolved_bets_failed = False # The last load failed, the index is incomplete
+        # Write-behind buffer: {(collection, doc_id): write}, flushed at the end of each cycle
+        self._pending_writes = {}
+        # {(collection, doc_id): group}; writes sharing a group are always committed in the same batch
+        self._write_groups = {}
+        # Outbox entries committed but not yet handed to the sender, see take_committed_notifications()
+        self._committed_notifications = []
+        self._buffering = False
+
+    def begin_cycle(self):
+        """
+        Loads the unresolved bets index and starts buffering writes until flush_writes().
+        Returns False if the index could not be read: the cycle sees no pending bets, so its
+        results must not be taken as final.
+        """
+        self.load_unresolved_bets()
+        self._buffering = True
+        return not self._unresolved_bets_failed
+
+    def _submit(self, writes):
+        """
+        Sets (or deletes, when data is None) documents as one atomic unit. While a cycle is
+        running the writes are only buffered, each coalescing with any earlier pending write
+        to the same document; otherwise they are committed at once.
+        """
+        if not self._buffering:
+            self._commit_units([writes])
+            return
+        group = writes[0][0] if len(writes) > 1 else None
+        for key, write in writes:
+            pending = self._pending_writes.pop(key, None)
+            data, merge = write['data'], write['merge']
+            if data is not None:
+                data = dict(data)
+                if merge and pending is not None:
+                    # A merge on top of a pending set keeps its mode; on top of a delete it is a plain set
+                    data = {**(pending['data'] or {}), **data}
+                    merge = pending['merge'] if pending['data'] is not None else False
+            # Re-insert so the flush order follows the latest write
+            self._pending_writes[key] = {'data': data, 'merge': merge}
+            if group is not None:
+                self._write_groups[key] = group
+            else:
+                self._write_groups.pop(key, None)
+
+    def _write(self, collection, doc_id, data=None, merge=False):
+        self._submit([((collection, str(doc_id)), {'data': data, 'merge': merge})])
+
+    def _pack_batches(self, units):
+        """Packs atomic units of writes into as few batches as the backend's limit allows."""
+        limit = self.backend.batch_limit
+        batches, batch = [], []
+        for unit in units:
+            if batch and len(batch) + len(unit) > limit:
+                batches.append(batch)
+                batch = []
+            batch.extend(unit)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _commit_units(self, units):
+        units = self._drop_duplicate_notifications(units)
+        for batch in self._pack_batches(units):
+            self.backend.commit(batch)
+            self._note_committed_notifications(batch)
+
+    def _drop_duplicate_notifications(self, units):
+        """
+        Idempotency: an outbox entry whose key already exists in storage (e.g. the same alert
+        re-produced after a restart) is not written again, so it cannot be sent twice.
+        """
+        keys = [key[1] for unit in units for key, write in unit if key[0] == 'notification_outbox' and write['data']]
+        if not keys:
+            return units
+        existing = self.backend.get_many('notification_outbox', keys)
+        if not existing:
+            return units
+        logger.info(f"Suppressed {len(existing)} duplicate notifications")
+        return [
+            [(key, write) for key, write in unit if not (key[0] == 'notification_outbox' and key[1] in existing)]
+            for unit in units
+        ]
+
+    def _note_committed_notifications(self, batch):
+        for (collection, doc_id), write in batch:
+            if collection == 'notification_outbox' and write['data'] and not write['merge']:
+                self._committed_notifications.append(write['data'])
+
+    def flush_writes(self):
+        """
+        Commits all buffered writes and stops buffering. Writes that belong together (a bet and
+        its outbox entry, a resolved bet and the delete of its unresolved document) are never
+        split across batches. Writes from a batch that failed to commit stay buffered and are
+        retried on the next flush.
+        """
+        self._buffering = False
+        if not self.backend:
+            self._pending_writes = {}
+            self._write_groups = {}
+            return 0
+        units, grouped = [], {}
+        for key, write in self._pending_writes.items():
+            group = self._write_groups.get(key)
+            if group is None:
+                units.append([(key, write)])
+            elif group in grouped:
+                grouped[group].append((key, write))
+            else:
+                grouped[group] = [(key, write)]
+                units.append(grouped[group])
+        total = len(self._pending_writes)
+        committed = 0
+        try:
+            batches = self._pack_batches(self._drop_duplicate_notifications(units))
+            kept = {key for batch in batches for key, _ in batch}
+            for key in list(self._pending_writes):
+                if key not in kept:
+                    # Duplicate outbox entry, already in storage
+                    self._forget_pending(key)
+            for batch in batches:
+                self.backend.commit(batch)
+                self._note_committed_notifications(batch)
+                for key, _ in batch:
+                    self._forget_pending(key)
+                committed += len(batch)
+        except Exception as e:
+            logger.error(f"Storage Error during flush_writes: {e}")
+        if total:
+            logger.info(f"Flushed {committed}/{total} buffered writes")
+        return committed
+
+    def _forget_pending(self, key):
+        self._pending_writes.pop(key, None)
+        self._write_groups.pop(key, None)
+
+    def _apply_pending(self, collection, doc_id, data):
+        """Overlays a still-buffered write on a document read from storage."""
+        pending = self._pending_writes.get((collection, str(doc_id)))
+        if pending is None:
+            return data
+        if pending['data'] is None or not pending['merge']:
+            return dict(pending['data']) if pending['data'] is not None else None
+        return {**(data or {}), **pending['data']}
+
+    # Note: All storage methods should check if self.backend is not None
+    def get_tracked_match(self, match_id):
+        if not self.backend: return None
+        try:
+            return self._apply_pending('tracked_matches', match_id, self.backend.get('tracked_matches', match_id))
+        except Exception as e:
+            logger.error(f"Storage Error during get_tracked_match: {e}")
+            return None
+
+    def get_tracked_matches(self, match_ids):
+        """
+        Reads the tracked state of many fixtures in as few round-trips as the backend allows.
+        Returns a dict keyed by fixture ID (as str) holding only the existing documents,
+        or None if the read failed so callers can fall back to get_tracked_match.
+        """
+        if not self.backend: return None
+        try:
+            ids = [str(match_id) for match_id in match_ids]
+            states = self.backend.get_many('tracked_matches', ids)
+            result = {}
+            for doc_id in ids:
+                state = self._apply_pending('tracked_matches', doc_id, states.get(doc_id))
+                if state is not None:
+                    result[doc_id] = state
+            return result
+        except Exception as e:
+            logger.error(f"Storage Error during get_tracked_matches: {e}")
+            return None
+
+    def update_tracked_match(self, match_id, data):
+        if not self.backend: return
+        try:
+            self._write('tracked_matches', match_id, data, merge=True)
+        except Exception as e:
+            logger.error(f"Storage Error during update_tracked_match: {e}")
+            
+    def delete_tracked_match(self, match_id):
+        if not self.backend: return
+        try:
+            self._write('tracked_matches', match_id)
+        except Exception as e:
+            logger.error(f"Storage Error during delete_tracked_match: {e}")
+
+    def load_unresolved_bets(self):
+        """
+        Reads the unresolved_bets collection once and keeps it as the in-memory index
+        for the current cycle. All later lookups are served from memory.
+        """
+        self._unresolved_bets = {}
+        self._unresolved_bets_failed = False
+        if not self.backend: return self._unresolved_bets
+        try:
+            self._unresolved_bets = self.backend.stream('unresolved_bets')
+            for key in list(self._pending_writes):
+                if key[0] == 'unresolved_bets':
+                    bet = self._apply_pending('unresolved_bets', key[1], self._unresolved_bets.get(key[1]))
+                    if bet is None:
+                        self._unresolved_bets.pop(key[1], None)
+                    else:
+                        self._unresolved_bets[key[1]] = bet
+            logger.info(f"Loaded {len(self._unresolved_bets)} unresolved bets")
+        except Exception as e:
+            self._unresolved_bets_failed = True
+            logger.error(f"Storage Error during load_unresolved_bets: {e}")
+        return self._unresolved_bets
+
+    def get_unresolved_bets(self):
+        if self._unresolved_bets is None:
+            return self.load_unresolved_bets()
+        return self._unresolved_bets
+
+    def get_unresolved_bet(self, match_id):
+        return self.get_unresolved_bets().get(str(match_id))
+    
+    def get_stale_unresolved_bets(self, bet_types, minutes_to_wait=STALE_BET_MINUTES):
+        """
+        Unresolved bets of the given types placed more than `minutes_to_wait` ago, served from
+        the in-memory index. Returns {doc_id: bet}.
+        """
+        threshold = self._clock() - timedelta(minutes=minutes_to_wait)
+        stale = {}
+        for doc_id, bet in self.get_unresolved_bets().items():
+            if bet.get('bet_type') not in bet_types:
+                continue
+            placed_at = bet.get('placed_at')
+            if isinstance(placed_at, str):
+                try:
+                    placed_at = datetime.strptime(placed_at, '%Y-%m-%d %H:%M:%S')
+                except ValueError:
+                    placed_at = None
+            elif isinstance(placed_at, datetime) and placed_at.tzinfo is not None:
+                placed_at = placed_at.replace(tzinfo=None) - (placed_at.utcoffset() or timedelta(0))
+            if placed_at is None or placed_at < threshold:
+                stale[doc_id] = bet
+        return stale
+
+    def _outbox_write(self, notification):
+        """
+        Outbox entry for a notification {'key', 'text', ...}. The key (fixture ID, bet type and
+        event) is the document ID, which makes the entry idempotent.
+        """
+        if not self.backend:
+            # Nothing to make it durable with; hand it straight to the sender
+            self._committed_notifications.append(notification)
+            return []
+        data = {**notification, 'created_at': self._clock().strftime('%Y-%m-%d %H:%M:%S'), 'delivered': False}
+        return [(('notification_outbox', notification['key']), {'data': data, 'merge': False})]
+
+    def add_unresolved_bet(self, match_id, data, notification=None):
+        """Adds the bet, together with its outbox entry if given, as one atomic write."""
+        outbox = self._outbox_write(notification) if notification else []
+        if not self.backend: return
+        try:
+            # Native UTC timestamp, the type the (bet_type, placed_at) index and the stale query compare
+            data['placed_at'] = self._clock().replace(tzinfo=timezone.utc)
+            self._submit([(('unresolved_bets', str(match_id)), {'data': data, 'merge': False})] + outbox)
+            if self._unresolved_bets is not None:
+                self._unresolved_bets[str(match_id)] = data
+        except Exception as e:
+            logger.error(f"Storage Error during add_unresolved_bet: {e}")
+
+    def move_many_to_resolved(self, resolutions):
+        """
+        Resolves several bets at once, e.g. a whole HT wave. `resolutions` is an iterable of
+        (match_id, bet_info, outcome) or (match_id, bet_info, outcome, notification).
+        Each resolved bet, the delete of its unresolved document and its outbox entry are one
+        atomic unit; during a cycle they are buffered until flush_writes(), otherwise they are
+        committed immediately, packed into as few batches as possible.
+        """
+        units = []
+        for match_id, bet_info, outcome, *notification in resolutions:
+            outbox = self._outbox_write(notification[0]) if notification and notification[0] else []
+            if not self.backend: continue
+            resolved_data = {
+                **bet_info,
+                'outcome': outcome,
+                'resolved_at': self._clock().strftime('%Y-%m-%d %H:%M:%S'),
+                'resolution_timestamp': self.backend.server_timestamp()
+            }
+            units.append([
+                (('resolved_bets', str(match_id)), {'data': resolved_data, 'merge': False}),
+                (('unresolved_bets', str(match_id)), {'data': None, 'merge': False}),
+            ] + outbox)
+            if self._unresolved_bets is not None:
+                self._unresolved_bets.pop(str(match_id), None)
+        if not self.backend: return False
+        try:
+            if self._buffering:
+                for unit in units:
+                    self._submit(unit)
+            else:
+                self._commit_units(units)
+            return True
+        except Exception as e:
+            logger.error(f"Storage Error during move_many_to_resolved: {e}")
+            return False
+
+    def move_to_resolved(self, match_id, bet_info, outcome, notification=None):
+        return self.move_many_to_resolved([(match_id, bet_info, outcome, notification)])
+
+    def add_to_resolved_bets(self, match_id, bet_info, outcome):
+        if not self.backend: return False
+        try:
+            resolved_data = {
+                **bet_info,
+                'outcome': outcome,
+                'resolved_at': self._clock().strftime('%Y-%m-%d %H:%M:%S'),
+                'resolution_timestamp': self.backend.server_timestamp()
+            }
+            # Use a unique ID based on match and timestamp since this is an append operation
+            doc_id = f"{match_id}-{self._clock().strftime('%Y%m%d%H%M%S')}"
+            self._write('resolved_bets', doc_id, resolved_data)
+            return True
+        except Exception as e:
+            logger.error(f"Storage Error during add_to_resolved_bets: {e}")
+            return False
+
+    def get_status_board(self, day):
+        if not self.backend: return None
+        try:
+            return self.backend.get('status_board', day)
+        except Exception as e:
+            logger.error(f"Storage Error during get_status_board: {e}")
+            return None
+
+    def save_status_board(self, day, board):
+        """Called from the sender thread; goes straight to the backend, bypassing the cycle's write buffer."""
+        if not self.backend: return
+        try:
+            self.backend.commit([(('status_board', str(day)), {'data': board, 'merge': False})])
+        except Exception as e:
+            logger.error(f"Storage Error during save_status_board: {e}")
+
+    def take_committed_notifications(self):
+        """Returns (and forgets) the outbox entries committed since the last call."""
+        notifications, self._committed_notifications = self._committed_notifications, []
+        return notifications
+
+    def get_pending_notifications(self):
+        """Outbox entries that were committed but never confirmed as delivered, e.g. before a restart."""
+        if not self.backend: return []
+        try:
+            pending = self.backend.find('notification_outbox', 'delivered', False)
+            return sorted(pending.values(), key=lambda entry: entry.get('created_at') or '')
+        except Exception as e:
+            logger.error(f"Storage Error during get_pending_notifications: {e}")
+            return []
+
+    def mark_notification_delivered(self, key):
+        """
+        Called from the sender thread once Telegram accepted the message. Goes straight to the
+        backend, bypassing the cycle's write buffer.
+        """
+        if not self.backend: return
+        try:
+            self.backend.commit([(('notification_outbox', key), {
+                'data': {'delivered': True, 'delivered_at': self._clock().strftime('%Y-%m-%d %H:%M:%S')},
+                'merge': True
+            })])
+        except Exception as e:
+            logger.error(f"Storage Error during mark_notification_delivered: {e}")
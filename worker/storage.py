@@ -0,0 +1,259 @@
+import copy
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+FIRESTORE_BATCH_LIMIT = 500 # Max writes per Firestore WriteBatch commit
+FIRESTORE_GET_ALL_CHUNK = 100 # Documents per batched get_all round-trip
+SQLITE_BATCH_LIMIT = 500
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+COLLECTIONS = ['tracked_matches', 'unresolved_bets', 'resolved_bets', 'notification_outbox', 'status_board']
+
+class StorageBackend:
+    """
+    Document store used by the bot for tracked matches, unresolved and resolved bets and
+    the notification outbox.
+    Documents are plain dicts addressed by (collection, doc_id). A write is
+    ((collection, doc_id), {'data': dict or None, 'merge': bool}); data None deletes the document.
+    """
+    name = 'base'
+    batch_limit = SQLITE_BATCH_LIMIT
+
+    def get(self, collection, doc_id):
+        """Returns the document as a dict, or None if it does not exist."""
+        raise NotImplementedError
+
+    def get_many(self, collection, doc_ids):
+        """Returns {doc_id: dict} for the documents that exist."""
+        raise NotImplementedError
+
+    def stream(self, collection):
+        """Returns every document of the collection as {doc_id: dict}."""
+        raise NotImplementedError
+
+    def find(self, collection, field, value):
+        """Returns the documents whose `field` equals `value` as {doc_id: dict}."""
+        raise NotImplementedError
+
+    def commit(self, writes):
+        """Applies up to `batch_limit` writes atomically."""
+        raise NotImplementedError
+
+    def server_timestamp(self):
+        """Value stored in `resolution_timestamp` fields."""
+        return datetime.utcnow()
+
+class FirestoreBackend(StorageBackend):
+    """Firebase Firestore backend."""
+    name = 'firestore'
+    batch_limit = FIRESTORE_BATCH_LIMIT
+
+    def __init__(self, credentials_json_string):
+        logger.info("Initializing Firebase...")
+        cred_dict = json.loads(credentials_json_string)
+        cred = credentials.Certificate(cred_dict)
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(cred)
+        self.db = firestore.client()
+        logger.info("Firebase initialized successfully")
+
+    def get(self, collection, doc_id):
+        doc = self.db.collection(collection).document(str(doc_id)).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_many(self, collection, doc_ids):
+        ref_collection = self.db.collection(collection)
+        ids = [str(doc_id) for doc_id in doc_ids]
+        result = {}
+        for start in range(0, len(ids), FIRESTORE_GET_ALL_CHUNK):
+            refs = [ref_collection.document(doc_id) for doc_id in ids[start:start + FIRESTORE_GET_ALL_CHUNK]]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    result[doc.id] = doc.to_dict()
+        return result
+
+    def stream(self, collection):
+        return {doc.id: doc.to_dict() for doc in self.db.collection(collection).stream()}
+
+    def find(self, collection, field, value):
+        query = self.db.collection(collection).where(filter=FieldFilter(field, '==', value))
+        return {doc.id: doc.to_dict() for doc in query.stream()}
+
+    def commit(self, writes):
+        batch = self.db.batch()
+        for (collection, doc_id), write in writes:
+            ref = self.db.collection(collection).document(str(doc_id))
+            if write['data'] is None:
+                batch.delete(ref)
+            else:
+                batch.set(ref, write['data'], merge=write['merge'])
+        batch.commit()
+
+    def server_timestamp(self):
+        return firestore.SERVER_TIMESTAMP
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class SQLiteBackend(StorageBackend):
+    """
+    Local SQLite backend (WAL mode) for single-node deployments and network-free runs.
+    Each collection is a table holding the JSON document plus indexed
+    fixture_id, bet_type and placed_at columns.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path):
+        logger.info(f"Opening SQLite storage at {path}")
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._tables = set()
+        for collection in COLLECTIONS:
+            self._ensure_table(collection)
+
+    def _ensure_table(self, collection):
+        if collection in self._tables:
+            return
+        if not collection.isidentifier():
+            raise ValueError(f"Invalid collection name: {collection}")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {collection} ("
+            "doc_id TEXT PRIMARY KEY, fixture_id INTEGER, bet_type TEXT, placed_at TEXT, data TEXT NOT NULL)"
+        )
+        for column in ('fixture_id', 'bet_type', 'placed_at'):
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{collection}_{column} ON {collection} ({column})")
+        self._tables.add(collection)
+
+    def get(self, collection, doc_id):
+        return self.get_many(collection, [doc_id]).get(str(doc_id))
+
+    def get_many(self, collection, doc_ids):
+        ids = [str(doc_id) for doc_id in doc_ids]
+        result = {}
+        with self._lock:
+            self._ensure_table(collection)
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(ids), SQLITE_BATCH_LIMIT):
+                chunk = ids[start:start + SQLITE_BATCH_LIMIT]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT doc_id, data FROM {collection} WHERE doc_id IN ({placeholders})", chunk
+                )
+                result.update({doc_id: json.loads(data) for doc_id, data in rows})
+        return result
+
+    def stream(self, collection):
+        with self._lock:
+            self._ensure_table(collection)
+            rows = self.conn.execute(f"SELECT doc_id, data FROM {collection}").fetchall()
+        return {doc_id: json.loads(data) for doc_id, data in rows}
+
+    def find(self, collection, field, value):
+        with self._lock:
+            self._ensure_table(collection)
+            rows = self.conn.execute(
+                f"SELECT doc_id, data FROM {collection} WHERE json_extract(data, '$.' || ?) = ?", (field, value)
+            ).fetchall()
+        return {doc_id: json.loads(data) for doc_id, data in rows}
+
+    def commit(self, writes):
+        with self._lock:
+            self.conn.execute('BEGIN')
+            try:
+                for (collection, doc_id), write in writes:
+                    self._ensure_table(collection)
+                    self._apply(collection, str(doc_id), write)
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def _apply(self, collection, doc_id, write):
+        data = write['data']
+        if data is None:
+            self.conn.execute(f"DELETE FROM {collection} WHERE doc_id = ?", (doc_id,))
+            return
+        if write['merge']:
+            row = self.conn.execute(f"SELECT data FROM {collection} WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row:
+                data = {**json.loads(row[0]), **data}
+        placed_at = data.get('placed_at')
+        if isinstance(placed_at, datetime):
+            placed_at = placed_at.strftime(TIMESTAMP_FORMAT)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {collection} (doc_id, fixture_id, bet_type, placed_at, data) VALUES (?, ?, ?, ?, ?)",
+            (doc_id, data.get('fixture_id'), data.get('bet_type'), placed_at, json.dumps(data, default=_encode_value))
+        )
+
+def _copy_document(data):
+    """Copy of a document; only nested containers need a deep copy, most fields are scalars."""
+    if data is None:
+        return None
+    return {key: copy.deepcopy(value) if isinstance(value, (dict, list)) else value for key, value in data.items()}
+
+class MemoryBackend(StorageBackend):
+    """In-process backend for tests, benchmarks and replays. Nothing is persisted."""
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.collections = {}
+
+    def get(self, collection, doc_id):
+        with self._lock:
+            return _copy_document(self.collections.get(collection, {}).get(str(doc_id)))
+
+    def get_many(self, collection, doc_ids):
+        with self._lock:
+            documents = self.collections.get(collection, {})
+            return {str(doc_id): _copy_document(documents[str(doc_id)]) for doc_id in doc_ids if str(doc_id) in documents}
+
+    def stream(self, collection):
+        with self._lock:
+            return {doc_id: _copy_document(data) for doc_id, data in self.collections.get(collection, {}).items()}
+
+    def find(self, collection, field, value):
+        with self._lock:
+            documents = self.collections.get(collection, {})
+            return {doc_id: _copy_document(data) for doc_id, data in documents.items() if data.get(field) == value}
+
+    def commit(self, writes):
+        with self._lock:
+            for (collection, doc_id), write in writes:
+                documents = self.collections.setdefault(collection, {})
+                data = _copy_document(write['data'])
+                if data is None:
+                    documents.pop(str(doc_id), None)
+                elif write['merge']:
+                    documents[str(doc_id)] = {**documents.get(str(doc_id), {}), **data}
+                else:
+                    documents[str(doc_id)] = data
+
+def create_storage_backend(name, firebase_credentials=None, sqlite_path=None):
+    """
+    Builds the backend selected by STORAGE_BACKEND ('firestore', 'sqlite' or 'memory').
+    Returns None when Firestore is selected but no credentials are configured.
+    """
+    name = (name or 'firestore').lower()
+    if name == 'sqlite':
+        return SQLiteBackend(sqlite_path)
+    if name == 'memory':
+        return MemoryBackend()
+    if name != 'firestore':
+        raise ValueError(f"Unknown storage backend: {name}")
+    if not firebase_credentials:
+        logger.warning("FIREBASE_CREDENTIALS_JSON is empty. Skipping Firebase initialization.")
+        return None
+    return FirestoreBackend(firebase_credentials)
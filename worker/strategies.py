@@ -0,0 +1,411 @@
+import copy
+import logging
+import numpy as np
+from columns import FixtureColumns
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+STATUS_LIVE = ['LIVE', '1H', '2H', 'ET', 'P']
+STATUS_HALFTIME = 'HT'
+STATUS_FINISHED = ['FT', 'AET', 'PEN']
+RESOLVE_HT = 'HT' # Settled from the half-time score
+RESOLVE_FT = 'FT' # Settled from the final score
+BET_TYPE_REGULAR = 'regular'
+BET_TYPE_32_OVER = '32_over'
+BET_TYPE_32_UNDER = '32_under'
+BET_TYPE_80_MINUTE = '80_minute'
+DEFAULT_STRATEGIES = [BET_TYPE_REGULAR]
+
+def bet_doc_id(fixture_id, bet_type):
+    """
+    unresolved_bets / resolved_bets document ID. The 36' bet keeps the plain fixture ID it
+    always had; the other rules add their bet type so one fixture can hold several bets.
+    """
+    return str(fixture_id) if bet_type == BET_TYPE_REGULAR else f"{fixture_id}-{bet_type}"
+
+def notification_key(fixture_id, bet_type, event):
+    """Idempotency key of a bet alert: one 'placed' and one 'result' alert per fixture and bet type."""
+    return f"{fixture_id}-{bet_type}-{event}"
+
+def parse_score(score):
+    """'2-1' -> (2, 1); None if the score is malformed."""
+    try:
+        home_goals, away_goals = map(int, score.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return home_goals, away_goals
+
+def parse_match(match):
+    """Pulls what the rules need out of one API-Football fixture."""
+    fixture = match['fixture']
+    teams = match['teams']
+    goals = match['goals']
+    home_goals = goals['home'] if goals['home'] is not None else 0
+    away_goals = goals['away'] if goals['away'] is not None else 0
+    return {
+        'fixture_id': fixture['id'],
+        'status': (fixture['status']['short'] or '').upper(),
+        'minute': fixture['status']['elapsed'],
+        'score': f"{home_goals}-{away_goals}",
+        'match_name': f"{teams['home']['name']} vs {teams['away']['name']}",
+        'league_name': match['league']['name'],
+        'country': match['league']['country'],
+        'league_id': match['league']['id'],
+    }
+
+class Strategy:
+    """
+    One betting rule. It declares the window it acts in (`status` + `minutes`), the score
+    predicate (`scores`; `bet_fields` returns the bet's fields, or None when the score does not
+    qualify), when the bet is settled (`resolution`) and how (`outcome`). `state_key` is the
+    rule's flag in the tracked-match document, `score_key` where it keeps the score it saw.
+    """
+    bet_type = None
+    label = None
+    status = '1H'
+    minutes = []
+    scores = []
+    resolution = RESOLVE_HT
+    state_key = None
+    score_key = None
+
+    def variant(self, **params):
+        """Copy of the rule with other parameters, e.g. variant(minutes=[30, 31, 32], scores=['1-1'])."""
+        strategy = copy.copy(self)
+        for name, value in params.items():
+            if not hasattr(strategy, name):
+                raise ValueError(f"Unknown parameter for {self.bet_type}: {name}")
+            setattr(strategy, name, value)
+        return strategy
+
+    def window_mask(self, columns):
+        """Vectorized window membership over a FixtureColumns."""
+        return columns.status_in([self.status]) & columns.minute_in(self.minutes)
+
+    def score_mask(self, columns):
+        """Vectorized score predicate over a FixtureColumns."""
+        return columns.score_in([parse_score(score) for score in self.scores])
+
+    def bet_fields(self, score):
+        raise NotImplementedError
+
+    def outcome(self, bet, score):
+        raise NotImplementedError
+
+    def placed_text(self, match_info, score, bet):
+        raise NotImplementedError
+
+    def result_text(self, bet, score, outcome):
+        raise NotImplementedError
+
+class CorrectScore36(Strategy):
+    """36' correct score: a level 1-1/2-2/3-3 at 36' stays unchanged until HT."""
+    bet_type = BET_TYPE_REGULAR
+    label = "36' correct score"
+    minutes = [35, 36, 37]
+    state_key = '36_bet_placed'
+    score_key = '36_score'
+    scores = ['1-1', '2-2', '3-3']
+
+    def bet_fields(self, score):
+        return {'36_score': score} if score in self.scores else None
+
+    def outcome(self, bet, score):
+        return 'win' if score == bet.get('36_score', '') else 'loss'
+
+    def placed_text(self, match_info, score, bet):
+        return f"⏱️ 36' - {match_info['match_name']}\n🏆 {match_info['league_name']} ({match_info['country']})\n🔢 Score: {score}\n🎯 Correct Score Bet Placed"
+
+    def result_text(self, bet, score, outcome):
+        return (
+            f"✅ HT Result: {bet['match_name']}\n"
+            f"🏆 {bet['league']} ({bet['country']})\n"
+            f"🔢 Score: {score}\n"
+            f"🎉 36' Bet WON"
+        ) if outcome == 'win' else (
+            f"❌ HT Result: {bet['match_name']}\n"
+            f"🏆 {bet['league']} ({bet['country']})\n"
+            f"🔢 Score: {score}\n"
+            f"🔁 36' Bet LOST"
+        )
+
+class Over32(Strategy):
+    """32' over: 1-0 or 0-1 at 32', total goals over 2.5 at FT."""
+    bet_type = BET_TYPE_32_OVER
+    label = "32' over 2.5"
+    minutes = [31, 32, 33]
+    resolution = RESOLVE_FT
+    state_key = '32_over_bet_placed'
+    score_key = '32_score'
+    scores = ['0-1', '1-0']
+    over_line = 2.5
+
+    def bet_fields(self, score):
+        return {'32_score': score, 'over_line': self.over_line} if score in self.scores else None
+
+    def outcome(self, bet, score):
+        total_goals = sum(parse_score(score))
+        over_line = bet.get('over_line', self.over_line)
+        if total_goals > over_line:
+            return 'win'
+        return 'loss' if total_goals < over_line else 'push'
+
+    def placed_text(self, match_info, score, bet):
+        return f"⏱️ 32' - {match_info['match_name']}\n🏆 {match_info['league_name']} ({match_info['country']})\n🔢 Score: {score}\n🎯 Bet Placed: Total Goals **Over {bet['over_line']}**"
+
+    def result_text(self, bet, score, outcome):
+        verdict = '✅ WON' if outcome == 'win' else '❌ LOST' if outcome == 'loss' else '➖ PUSH'
+        return f"🏁 FINAL RESULT - 32' Over Bet\n⚽ {bet['match_name']}\n🔢 Final Score: {score}\n🎯 Bet: Over {bet.get('over_line')}\n📊 Outcome: {verdict}"
+
+class Under32(Strategy):
+    """32' under: a 4-0/5-0 (or 0-4/0-5) rout at 32', no further goal before HT."""
+    bet_type = BET_TYPE_32_UNDER
+    label = "32' under"
+    minutes = [31, 32, 33]
+    state_key = '32_under_bet_placed'
+    score_key = '32_score'
+    scores = ['4-0', '5-0', '0-4', '0-5']
+
+    def bet_fields(self, score):
+        if score not in self.scores:
+            return None
+        home_goals, away_goals = parse_score(score)
+        # The line is the current total plus half a goal
+        return {
+            '32_score': score,
+            'team': 'Team 1' if home_goals > away_goals else 'Team 2',
+            'under_line': home_goals + away_goals + 0.5
+        }
+
+    def outcome(self, bet, score):
+        return 'win' if sum(parse_score(score)) < bet.get('under_line') else 'loss'
+
+    def placed_text(self, match_info, score, bet):
+        return f"⏱️ 32' - {match_info['match_name']}\n🏆 {match_info['league_name']} ({match_info['country']})\n🔢 Score: {score}\n🎯 Bet Placed: {bet['team']} under {bet['under_line']}"
+
+    def result_text(self, bet, score, outcome):
+        under_line = bet.get('under_line')
+        return (
+            f"✅ HT Result: {bet['match_name']}\n🏆 {bet['league']} ({bet['country']})\n🔢 Score: {score}\n🎉 32' Bet WON (Under {under_line})"
+        ) if outcome == 'win' else (
+            f"❌ HT Result: {bet['match_name']}\n🏆 {bet['league']} ({bet['country']})\n🔢 Score: {score}\n🔁 32' Bet LOST (Under {under_line})"
+        )
+
+class CorrectScore80(Strategy):
+    """80' correct score: a 3-1/2-0 at 80' is the final score."""
+    bet_type = BET_TYPE_80_MINUTE
+    label = "80' correct score"
+    status = '2H'
+    minutes = [79, 80, 81]
+    resolution = RESOLVE_FT
+    state_key = '80_bet_placed'
+    score_key = '80_score'
+    scores = ['3-1', '2-0']
+
+    def bet_fields(self, score):
+        return {'80_score': score} if score in self.scores else None
+
+    def outcome(self, bet, score):
+        return 'win' if score == bet.get('80_score') else 'loss'
+
+    def placed_text(self, match_info, score, bet):
+        return f"⏱️ 80' - {match_info['match_name']}\n🏆 {match_info['league_name']} ({match_info['country']})\n🔢 Score: {score}\n🎯 80' Correct Score Bet Placed"
+
+    def result_text(self, bet, score, outcome):
+        return f"🏁 FINAL RESULT - 80' Bet\n⚽ {bet['match_name']}\n🔢 Final Score: {score}\n🎯 Bet on 80' Score: {bet.get('80_score')}\n📊 Outcome: {'✅ WON' if outcome == 'win' else '❌ LOST'}"
+
+# Every known rule, by bet type. Pending bets are settled even if their rule was disabled since.
+STRATEGIES = {strategy.bet_type: strategy for strategy in (CorrectScore36(), Over32(), Under32(), CorrectScore80())}
+
+def enabled_strategies(names):
+    """Rules selected by a comma-separated list of bet types (the STRATEGIES env variable)."""
+    selected = [name.strip() for name in (names or '').split(',') if name.strip()] or DEFAULT_STRATEGIES
+    unknown = [name for name in selected if name not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies: {', '.join(unknown)}")
+    return [STRATEGIES[name] for name in selected]
+
+class StrategyEngine:
+    """
+    Evaluates every enabled rule against one fetched snapshot in a single pass per fixture:
+    places bets inside the rules' windows, settles HT bets at half-time and FT bets from the
+    final score, keeping each rule's flags in the fixture's tracked-match document.
+    """
+    def __init__(self, state_manager, strategies):
+        self.state_manager = state_manager
+        self.strategies = list(strategies)
+        # Previous live=all snapshot as columns (status, minute, home goals, away goals, ...)
+        self.snapshot = FixtureColumns.from_matches([])
+        self._next_snapshot = None
+
+    @property
+    def windows(self):
+        """(status, minutes) pairs for the poll scheduler."""
+        return [(strategy.status, strategy.minutes) for strategy in self.strategies]
+
+    @property
+    def acts_after_halftime(self):
+        return any(strategy.status != '1H' for strategy in self.strategies)
+
+    def pending_bets(self, fixture_id, resolution=None):
+        """
+        [(strategy, doc_id, bet)] for the fixture's unresolved bets, optionally of one resolution
+        point. Bets the single-strategy workers stored under the plain fixture ID are found too.
+        """
+        pending = []
+        for strategy in STRATEGIES.values():
+            if resolution and strategy.resolution != resolution:
+                continue
+            for doc_id in dict.fromkeys([bet_doc_id(fixture_id, strategy.bet_type), str(fixture_id)]):
+                bet = self.state_manager.get_unresolved_bet(doc_id)
+                if bet and bet.get('bet_type', BET_TYPE_REGULAR) == strategy.bet_type:
+                    pending.append((strategy, doc_id, bet))
+                    break
+        return pending
+
+    def ht_pending_fixture_ids(self):
+        """Fixtures with a bet settled at half-time, which the poll scheduler has to catch at HT."""
+        return {
+            str(bet.get('fixture_id', doc_id.split('-')[0]))
+            for doc_id, bet in self.state_manager.get_unresolved_bets().items()
+            if STRATEGIES.get(bet.get('bet_type', BET_TYPE_REGULAR), STRATEGIES[BET_TYPE_REGULAR]).resolution == RESOLVE_HT
+        }
+
+    def diff_snapshot(self, columns):
+        """
+        Compares a FixtureColumns snapshot with the previous one. Returns a mask of the rows that
+        changed and the number of changes per kind ('new', 'status', 'goals', 'minute');
+        unchanged fixtures were already evaluated in that state. The new snapshot only replaces
+        the previous one on commit_snapshot(), so a cycle that failed, or ran without the
+        unresolved bets index, is evaluated again.
+        """
+        self._next_snapshot = columns
+        previous = self.snapshot
+        if not len(previous):
+            return np.ones(len(columns), dtype=bool), {'new': len(columns), 'status': 0, 'goals': 0, 'minute': 0}
+        rows, found = previous.lookup(columns.fixture_id)
+        status = found & (previous.status[rows] != columns.status)
+        goals = found & ~status & ((previous.home[rows] != columns.home) | (previous.away[rows] != columns.away))
+        minute = found & ~status & ~goals & (previous.elapsed[rows] != columns.elapsed)
+        deltas = {
+            'new': int((~found).sum()), 'status': int(status.sum()),
+            'goals': int(goals.sum()), 'minute': int(minute.sum()),
+        }
+        return ~found | status | goals | minute, deltas
+
+    def commit_snapshot(self):
+        if self._next_snapshot is not None:
+            self.snapshot, self._next_snapshot = self._next_snapshot, None
+
+    def select_candidates(self, columns, changed=None):
+        """
+        Evaluates the rules over all fixtures at once. Returns the rows that can trigger an
+        action (inside an enabled rule's window, at HT with a pending HT bet, or finished),
+        restricted to `changed` if given, and for each row inside a window
+        {bet_type: score qualifies}.
+        """
+        finished = columns.status_in(STATUS_FINISHED)
+        ht_pending = [int(fixture_id) for fixture_id in self.ht_pending_fixture_ids() if fixture_id.isdigit()]
+        halftime = columns.status_in([STATUS_HALFTIME]) & np.isin(columns.fixture_id, ht_pending)
+        in_window = np.zeros(len(columns), dtype=bool)
+        decisions = {}
+        for strategy in self.strategies:
+            window = strategy.window_mask(columns)
+            if not window.any():
+                continue
+            qualifies = strategy.score_mask(columns)
+            in_window |= window
+            for row in np.flatnonzero(window):
+                decisions.setdefault(int(row), {})[strategy.bet_type] = bool(qualifies[row])
+        candidates = finished | halftime | in_window
+        if changed is not None:
+            candidates &= changed
+        return [int(row) for row in np.flatnonzero(candidates)], decisions
+
+    def process(self, match, tracked_states=None, decisions=None):
+        """
+        Runs all enabled rules for one fixture. `tracked_states` is the map prefetched by
+        get_tracked_matches; without it the state is read for this fixture alone.
+        `decisions` ({bet_type: score qualifies}, from select_candidates) saves re-checking
+        the score predicates.
+        """
+        info = parse_match(match)
+        fixture_id, status, minute, score = info['fixture_id'], info['status'], info['minute'], info['score']
+
+        if status in STATUS_FINISHED:
+            self.settle(fixture_id, score, RESOLVE_FT)
+            # Nothing left to track once every bet on the fixture is settled
+            if not self.pending_bets(fixture_id):
+                self.state_manager.delete_tracked_match(fixture_id)
+            return
+        if status not in STATUS_LIVE and status != STATUS_HALFTIME:
+            return
+        if minute is None and status != STATUS_HALFTIME:
+            return
+
+        if tracked_states is not None:
+            stored = tracked_states.get(str(fixture_id))
+        else:
+            stored = self.state_manager.get_tracked_match(fixture_id)
+        state = dict(stored or {})
+
+        placed = False
+        for strategy in self.strategies:
+            if status == strategy.status and minute in strategy.minutes and not state.get(strategy.state_key):
+                self.place(strategy, state, info, decisions.get(strategy.bet_type) if decisions else None)
+                placed = True
+        if placed:
+            self.state_manager.update_tracked_match(fixture_id, state)
+
+        if status == STATUS_HALFTIME:
+            self.settle(fixture_id, score, RESOLVE_HT)
+            # Without second-half rules or bets awaiting FT the fixture needs no more state
+            if stored is not None and not self.acts_after_halftime and not self.pending_bets(fixture_id):
+                self.state_manager.delete_tracked_match(fixture_id)
+
+    def place(self, strategy, state, info, qualifies=None):
+        """Marks the rule as done for the fixture and places its bet if the score qualifies."""
+        state[strategy.state_key] = True
+        fields = strategy.bet_fields(info['score']) if qualifies is not False else None
+        if fields is None:
+            return None
+        state[strategy.score_key] = info['score']
+        bet = {
+            'match_name': info['match_name'],
+            'league': info['league_name'],
+            'country': info['country'],
+            'league_id': info['league_id'],
+            'bet_type': strategy.bet_type,
+            'fixture_id': info['fixture_id'],
+            **fields
+        }
+        # The alert is written to the outbox together with the bet and sent once both are committed
+        self.state_manager.add_unresolved_bet(bet_doc_id(info['fixture_id'], strategy.bet_type), bet, notification={
+            'key': notification_key(info['fixture_id'], strategy.bet_type, 'placed'),
+            'text': strategy.placed_text(info, info['score'], bet),
+            'fixture_id': info['fixture_id'],
+            'bet_type': strategy.bet_type,
+            'event': 'placed'
+        })
+        return bet
+
+    def settle(self, fixture_id, score, resolution):
+        """Settles the fixture's pending bets of one resolution point against `score`."""
+        if parse_score(score) is None:
+            logger.warning(f"Cannot settle bets on fixture {fixture_id}: malformed score {score}")
+            return 0
+        resolutions = []
+        for strategy, doc_id, bet in self.pending_bets(fixture_id, resolution):
+            outcome = strategy.outcome(bet, score)
+            resolutions.append((doc_id, bet, outcome, {
+                'key': notification_key(fixture_id, strategy.bet_type, 'result'),
+                'text': strategy.result_text(bet, score, outcome),
+                'fixture_id': fixture_id,
+                'bet_type': strategy.bet_type,
+                'event': 'result',
+                'outcome': outcome
+            }))
+        if resolutions:
+            self.state_manager.move_many_to_resolved(resolutions)
+        return len(resolutions)
@@ -0,0 +1,143 @@
+import argparse
+import csv
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from backtest import Backtest, Timelines
+from strategies import STRATEGIES
+
+logger = logging.getLogger("FootballBettingBot")
+
+# --- CONSTANTS ---
+ALL_LEAGUES = 'all'
+RESULT_FIELDS = ['strategy', 'minutes', 'scores', 'leagues', 'bets', 'win', 'loss', 'push', 'open', 'hit_rate']
+
+# Dataset of the worker process, memory-mapped once by _init_worker
+_timelines = None
+
+def _init_worker(directory):
+    global _timelines
+    logging.basicConfig(level=logging.WARNING)
+    _timelines = Timelines.load_arrays(directory, mmap_mode='r')
+
+def run_variant(variant):
+    """Backtests one grid point in a worker process; returns the variant with its counts."""
+    strategy = STRATEGIES[variant['strategy']].variant(minutes=variant['minutes'], scores=variant['scores'])
+    report = Backtest([strategy], leagues=variant['leagues']).run(_timelines)
+    counts = report['strategies'].get(strategy.bet_type) or {'bets': 0, 'win': 0, 'loss': 0, 'push': 0, 'open': 0, 'hit_rate': None}
+    return {**variant, **counts}
+
+def minute_windows(minutes, width):
+    """Sliding windows of `width` consecutive minutes over a 'first-last' range, e.g. '30-40'."""
+    first, last = (int(minute) for minute in minutes.split('-'))
+    return [list(range(start, start + width)) for start in range(first, last - width + 2)]
+
+def top_leagues(timelines, count):
+    """IDs of the `count` leagues with the most fixtures."""
+    league_ids, fixtures = np.unique(np.asarray(timelines.league_id), return_counts=True)
+    return [int(league_id) for league_id in league_ids[np.argsort(-fixtures, kind='stable')][:count]]
+
+def build_grid(strategy, windows, score_sets, league_sets):
+    return [
+        {'strategy': strategy, 'minutes': minutes, 'scores': scores, 'leagues': leagues}
+        for minutes, scores, leagues in itertools.product(windows, score_sets, league_sets)
+    ]
+
+def sweep(directory, grid, workers=None):
+    """
+    Runs every grid point as a separate backtest across a process pool. Each worker maps the
+    .npy dataset in `directory` read-only, so all of them share its pages through the OS page
+    cache instead of receiving a pickled copy. Yields results as variants complete.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(directory,)) as pool:
+        futures = {pool.submit(run_variant, variant): variant for variant in grid}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                logger.error(f"Variant {futures[future]} failed: {e}")
+
+def _format(values):
+    if values is None:
+        return ALL_LEAGUES
+    return ','.join(str(value) for value in values)
+
+def print_results(results, limit=None):
+    print(f"{'strategy':<12} {'minutes':<12} {'scores':<24} {'leagues':<16} {'bets':>7} {'win':>7} {'hit rate':>9}")
+    for result in results[:limit]:
+        hit_rate = '-' if result['hit_rate'] is None else f"{100 * result['hit_rate']:.1f}%"
+        minutes = f"{min(result['minutes'])}-{max(result['minutes'])}"
+        print(
+            f"{result['strategy']:<12} {minutes:<12} {_format(result['scores']):<24} {_format(result['leagues']):<16} "
+            f"{result['bets']:>7} {result['win']:>7} {hit_rate:>9}"
+        )
+
+def write_results(results, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for result in results:
+            writer.writerow({
+                **result,
+                'minutes': _format(result['minutes']),
+                'scores': _format(result['scores']),
+                'leagues': _format(result['leagues']),
+            })
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest a grid of strategy parameters in parallel.")
+    parser.add_argument('dataset', help="Timelines saved with backtest.py --save-arrays (other formats are converted to a temporary copy)")
+    parser.add_argument('--strategy', default='regular', choices=sorted(STRATEGIES), help="Rule whose parameters are varied")
+    parser.add_argument('--minutes', help="Minute range to slide the window over, e.g. 30-40 (default: the rule's window)")
+    parser.add_argument('--width', type=int, help="Window width in minutes (default: the rule's)")
+    parser.add_argument('--scores', action='append', help="Comma-separated score set, e.g. 1-1,2-2; repeat for several (default: the rule's)")
+    parser.add_argument('--leagues', action='append', help="Comma-separated league IDs or 'all'; repeat for several (default: all)")
+    parser.add_argument('--top-leagues', type=int, default=0, help="Also test each of the N leagues with the most fixtures on its own")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--output', help="Write all results to this CSV file")
+    parser.add_argument('--limit', type=int, default=20, help="Rows to print")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    started = time.perf_counter()
+    directory, temporary = args.dataset, None
+    if not os.path.isdir(directory):
+        temporary = tempfile.mkdtemp(prefix='timelines-')
+        Timelines.load(args.dataset).save(temporary)
+        directory = temporary
+    try:
+        timelines = Timelines.load_arrays(directory)
+        base = STRATEGIES[args.strategy]
+        width = args.width or len(base.minutes)
+        windows = minute_windows(args.minutes, width) if args.minutes else [list(base.minutes)]
+        score_sets = [scores.split(',') for scores in args.scores] if args.scores else [list(base.scores)]
+        league_sets = [
+            None if leagues == ALL_LEAGUES else [int(league_id) for league_id in leagues.split(',')]
+            for leagues in (args.leagues or [ALL_LEAGUES])
+        ]
+        league_sets += [[league_id] for league_id in top_leagues(timelines, args.top_leagues)]
+        grid = build_grid(args.strategy, windows, score_sets, league_sets)
+        print(f"{len(grid)} variants of {base.label} over {len(timelines)} fixtures on {args.workers} workers")
+
+        results = []
+        for result in sweep(directory, grid, args.workers):
+            results.append(result)
+            if len(results) % 10 == 0:
+                print(f"{len(results)}/{len(grid)} done after {time.perf_counter() - started:.1f}s")
+    finally:
+        if temporary:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    results.sort(key=lambda result: (result['hit_rate'] is not None, result['hit_rate'] or 0, result['bets']), reverse=True)
+    print(f"{len(results)} variants in {time.perf_counter() - started:.1f}s")
+    print_results(results, args.limit)
+    if args.output:
+        write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import pytest
+
+# The worker modules are flat and import each other by name (`from storage import ...`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from storage import MemoryBackend, SQLiteBackend
+
+class RecordingBackend:
+    """Wraps a backend, recording every committed batch; `fail_commits`/`fail_streams` make the next commits/index loads raise."""
+    def __init__(self, inner, batch_limit=None):
+        self.inner = inner
+        self.batch_limit = batch_limit or inner.batch_limit
+        self.batches = []
+        self.fail_commits = 0
+        self.fail_streams = 0
+
+    def commit(self, writes):
+        if self.fail_commits:
+            self.fail_commits -= 1
+            raise RuntimeError("commit failed")
+        self.batches.append(list(writes))
+        self.inner.commit(writes)
+
+    def stream(self, collection):
+        if collection == 'unresolved_bets' and self.fail_streams:
+            self.fail_streams -= 1
+            raise RuntimeError("stream failed")
+        return self.inner.stream(collection)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    inner = MemoryBackend() if request.param == 'memory' else SQLiteBackend(str(tmp_path / 'state.db'))
+    return RecordingBackend(inner)
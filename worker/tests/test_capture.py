@@ -0,0 +1,53 @@
+import json
+import os
+from capture import FeedCapture, read_capture
+
+DAY = 1_792_195_200 # 2026-10-17 00:00 UTC
+
+class FakeResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.text = json.dumps(body)
+        self.headers = headers or {}
+
+def capture_at(directory, now):
+    clock = {'now': now}
+    return FeedCapture(str(directory), clock=lambda: clock['now']), clock
+
+def test_records_round_trip_with_the_rate_limit_headers(tmp_path):
+    capture, clock = capture_at(tmp_path, DAY + 60)
+    capture.record('https://api/fixtures?live=all', None, FakeResponse(200, {'response': []}, {
+        'X-RateLimit-Remaining': '9', 'x-ratelimit-requests-remaining': '99', 'Content-Type': 'application/json',
+    }))
+    clock['now'] += 15
+    capture.record('https://api/fixtures', {'ids': '1-2'}, FakeResponse(429, {}, {'Retry-After': '30'}))
+    capture.close()
+    records = read_capture(str(tmp_path))
+    assert [record['ts'] for record in records] == [DAY + 60, DAY + 75]
+    assert records[0]['headers'] == {'X-RateLimit-Remaining': '9', 'x-ratelimit-requests-remaining': '99'}
+    assert json.loads(records[0]['body']) == {'response': []}
+    assert records[1]['params'] == {'ids': '1-2'} and records[1]['status'] == 429
+
+def test_a_new_file_per_utc_day(tmp_path):
+    capture, clock = capture_at(tmp_path, DAY - 10)
+    capture.record('https://api/fixtures?live=all', None, FakeResponse(200, {}))
+    clock['now'] = DAY + 10
+    capture.record('https://api/fixtures?live=all', None, FakeResponse(200, {}))
+    capture.close()
+    assert len(os.listdir(tmp_path)) == 2
+    assert len(read_capture(str(tmp_path))) == 2
+
+def test_truncated_capture_keeps_the_records_before_the_damage(tmp_path):
+    capture, clock = capture_at(tmp_path, DAY)
+    for index in range(50):
+        clock['now'] = DAY + index
+        capture.record('https://api/fixtures?live=all', None, FakeResponse(200, {'response': ['x' * 200]}))
+    # Never closed, as after a crash: the gzip trailer is missing; cut into the last record too
+    path = capture.path
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-20])
+    records = read_capture(path)
+    assert 0 < len(records) < 50
+    assert [record['ts'] for record in records] == [DAY + index for index in range(len(records))]
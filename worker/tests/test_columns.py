@@ -0,0 +1,62 @@
+import numpy as np
+from columns import FixtureColumns, NO_MINUTE, status_code
+from state import StateManager
+from storage import MemoryBackend
+from strategies import StrategyEngine, enabled_strategies
+
+def match(fixture_id, status, elapsed, home, away, league_id=39):
+    return {
+        'fixture': {'id': fixture_id, 'status': {'short': status, 'elapsed': elapsed}},
+        'league': {'id': league_id},
+        'goals': {'home': home, 'away': away},
+    }
+
+def test_columns_from_matches():
+    columns = FixtureColumns.from_matches([match(7, '1H', None, None, 2), match(8, 'ft', 90, 1, 1, league_id=140)])
+    assert len(columns) == 2
+    assert columns.fixture_id.tolist() == [7, 8]
+    assert columns.elapsed.tolist() == [NO_MINUTE, 90]
+    assert columns.status.tolist() == [status_code('1H'), status_code('FT')]
+    assert columns.home.tolist() == [0, 1] and columns.away.tolist() == [2, 1]
+    assert columns.league_id.tolist() == [39, 140]
+    assert status_code('XYZ') == 0
+
+def test_masks():
+    columns = FixtureColumns.from_matches([match(1, '1H', 36, 1, 1), match(2, '2H', 80, 2, 0), match(3, 'HT', 45, 1, 1)])
+    assert columns.status_in(['1H', 'HT']).tolist() == [True, False, True]
+    assert columns.minute_in([35, 36, 37]).tolist() == [True, False, False]
+    assert columns.score_in([(1, 1), (2, 2)]).tolist() == [True, False, True]
+
+def test_lookup_finds_rows_in_unsorted_columns():
+    columns = FixtureColumns.from_matches([match(fixture_id, '1H', 10, 0, 0) for fixture_id in (30, 10, 20)])
+    rows, found = columns.lookup([20, 99, 30, 5])
+    assert found.tolist() == [True, False, True, False]
+    assert rows[found].tolist() == [2, 0]
+    rows, found = FixtureColumns.from_matches([]).lookup([1])
+    assert found.tolist() == [False]
+
+def test_select_candidates_matches_the_rules():
+    engine = StrategyEngine(StateManager(MemoryBackend()), enabled_strategies('regular,80_minute'))
+    columns = FixtureColumns.from_matches([
+        match(1, '1H', 36, 1, 1), # in the 36' window, qualifies
+        match(2, '1H', 36, 1, 0), # in the window, does not qualify
+        match(3, '1H', 20, 0, 0), # outside every window
+        match(4, '2H', 80, 2, 0), # in the 80' window
+        match(5, 'FT', 90, 0, 0), # finished
+        match(6, 'HT', 45, 1, 1), # HT without a pending bet
+    ])
+    rows, decisions = engine.select_candidates(columns)
+    assert rows == [0, 1, 3, 4]
+    assert decisions == {0: {'regular': True}, 1: {'regular': False}, 3: {'80_minute': True}}
+    rows, _ = engine.select_candidates(columns, changed=np.array([False, True, True, True, False, True]))
+    assert rows == [1, 3]
+
+def test_half_time_fixture_is_a_candidate_only_with_a_pending_ht_bet():
+    backend = MemoryBackend()
+    backend.commit([(('unresolved_bets', '6'), {'data': {'bet_type': 'regular', 'fixture_id': 6}, 'merge': False})])
+    state = StateManager(backend)
+    state.begin_cycle()
+    engine = StrategyEngine(state, enabled_strategies('regular'))
+    columns = FixtureColumns.from_matches([match(6, 'HT', 45, 1, 1), match(7, 'HT', 45, 1, 1)])
+    rows, _ = engine.select_candidates(columns)
+    assert rows == [0]
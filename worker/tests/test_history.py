@@ -0,0 +1,60 @@
+from datetime import datetime
+from history import FixtureHistory, build_timeline, timeline_from_events
+
+def test_build_timeline_fills_minutes_between_observations():
+    timeline = build_timeline([('HT', 45, 1, 2), ('1H', 38, 1, 2), ('1H', 35, 1, 1)], final=['FT', 90, 2, 2])
+    assert timeline == [
+        ['1H', 35, 1, 1], ['1H', 36, 1, 1], ['1H', 37, 1, 1], ['1H', 38, 1, 2],
+        ['HT', 45, 1, 2], ['FT', 90, 2, 2],
+    ]
+
+def test_build_timeline_keeps_an_observed_final_state():
+    timeline = build_timeline([('2H', 89, 0, 0), ('FT', 90, 1, 0)], final=['FT', 90, 1, 0])
+    assert timeline == [['2H', 89, 0, 0], ['FT', 90, 1, 0]]
+
+def fixture_row(**overrides):
+    row = {'home_id': 1, 'status': 'FT', 'elapsed': 90, 'home_goals': 2, 'away_goals': 1, 'ht_home': None, 'ht_away': None}
+    row.update(overrides)
+    return row
+
+def test_timeline_from_goal_events():
+    events = [
+        (10, None, 1, 'Goal', 'Normal Goal'),
+        (20, None, 2, 'Goal', 'Missed Penalty'),
+        (30, None, 1, 'Card', 'Yellow Card'),
+        (45, 2, 2, 'Goal', 'Penalty'),
+        (70, None, 1, 'Goal', 'Own Goal'),
+    ]
+    timeline = timeline_from_events(fixture_row(), events)
+    by_minute = {(status, elapsed): (home, away) for status, elapsed, home, away in timeline}
+    assert by_minute[('1H', 9)] == (0, 0)
+    assert by_minute[('1H', 36)] == (1, 0)
+    assert by_minute[('HT', 45)] == (1, 1)
+    assert by_minute[('2H', 80)] == (2, 1)
+    assert timeline[-1] == ['FT', 90, 2, 1]
+
+def test_half_time_score_of_the_fixture_wins_over_events():
+    timeline = timeline_from_events(fixture_row(home_goals=0, away_goals=0, ht_home=0, ht_away=0), [])
+    assert ['HT', 45, 0, 0] in timeline and timeline[-1] == ['FT', 90, 0, 0]
+
+def live(fixture_id, status, elapsed, home, away, league_id=39):
+    return {
+        'fixture': {'id': fixture_id, 'date': '2026-10-17T12:00:00+00:00', 'status': {'short': status, 'elapsed': elapsed}},
+        'league': {'id': league_id, 'name': 'Premier League', 'country': 'England', 'season': 2026},
+        'teams': {'home': {'id': 1, 'name': 'A'}, 'away': {'id': 2, 'name': 'B'}},
+        'goals': {'home': home, 'away': away},
+    }
+
+def test_recorded_snapshots_export_as_backtest_records(tmp_path):
+    history = FixtureHistory(str(tmp_path / 'history.db'))
+    at = datetime(2026, 10, 17, 12)
+    history.record_snapshot([live(1, '1H', 35, 1, 1), live(2, '1H', 10, 0, 0, league_id=140)], observed_at=at)
+    history.record_snapshot([live(1, '1H', 37, 1, 1), live(2, 'NS', None, 0, 0, league_id=140)], observed_at=at)
+    history.record_snapshot([live(1, 'FT', 90, 2, 1)], observed_at=at)
+    records = list(history.export_records('2026-10-17', '2026-10-17', leagues=[39]))
+    assert len(records) == 1
+    assert records[0]['fixture_id'] == 1 and records[0]['league'] == 'Premier League'
+    assert records[0]['timeline'] == [['1H', 35, 1, 1], ['1H', 36, 1, 1], ['1H', 37, 1, 1], ['FT', 90, 2, 1]]
+    # Not finished: not exported
+    assert list(history.export_records(leagues=[140])) == []
+    history.close()
@@ -0,0 +1,157 @@
+import json
+import time
+from datetime import datetime
+from notifier import TelegramOutbox, StatusBoard, build_digests, MAX_REQUEUES, MESSAGE_LIMIT
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = json.dumps(body)
+
+    def json(self):
+        return json.loads(self.text)
+
+class FakeTelegram:
+    """Accepts every Bot API call unless `down`, recording the messages sent."""
+    def __init__(self):
+        self.down = False
+        self.sent = []
+
+    def post(self, url, data=None, **kwargs):
+        if self.down:
+            return FakeResponse(502, {'ok': False})
+        self.sent.append((url.rsplit('/', 1)[-1], data))
+        return FakeResponse(200, {'ok': True, 'result': {'message_id': len(self.sent)}})
+
+def outbox_for(telegram, delivered=None):
+    on_delivered = delivered.append if delivered is not None else None
+    return TelegramOutbox(telegram, 'token', '1', sleep=lambda seconds: None, on_delivered=on_delivered)
+
+def alert(key, fixture_id=1, event='placed', outcome=None):
+    return {'key': key, 'text': f"alert {key}", 'fixture_id': fixture_id, 'bet_type': 'regular',
+            'event': event, 'outcome': outcome}
+
+def test_keyed_message_is_queued_once():
+    telegram, delivered = FakeTelegram(), []
+    outbox = outbox_for(telegram, delivered)
+    assert outbox.submit('hello', key='k')
+    assert not outbox.submit('hello', key='k')
+    assert outbox.drain(5)
+    assert delivered == ['k']
+    assert not outbox.submit('hello', key='k')
+    assert len(telegram.sent) == 1
+
+def test_given_up_key_can_be_submitted_again():
+    telegram, delivered = FakeTelegram(), []
+    outbox = outbox_for(telegram, delivered)
+    outbox._keys.add('k')
+    outbox._record({'text': 'hello', 'keys': ['k'], 'enqueued_at': time.monotonic(), 'requeues': MAX_REQUEUES}, False)
+    assert outbox.failed == 1
+    # What the bot's periodic outbox re-scan does once Telegram is back
+    assert outbox.submit('hello', key='k')
+    assert outbox.drain(5)
+    assert delivered == ['k']
+
+def test_board_ignores_alerts_already_waiting_for_an_edit():
+    telegram = FakeTelegram()
+    boards = {}
+    board = StatusBoard(outbox_for(telegram), boards.get, boards.__setitem__)
+    board.add([alert('1-placed')])
+    board.add([alert('1-placed')])
+    assert [entry['key'] for entry in board._pending] == ['1-placed']
+
+class BoardClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def board_for(telegram, now, boards=None, delivered=None):
+    boards = {} if boards is None else boards
+    on_delivered = delivered.append if delivered is not None else None
+    return StatusBoard(outbox_for(telegram), boards.get, boards.__setitem__,
+                       on_delivered=on_delivered, clock=BoardClock(now))
+
+def test_board_header_counts_pushes_apart_from_losses():
+    board = board_for(FakeTelegram(), datetime(2026, 10, 17, 12))
+    board.add([
+        alert('1-placed', fixture_id=1),
+        alert('2-result', fixture_id=2, event='result', outcome='win'),
+        alert('3-result', fixture_id=3, event='result', outcome='loss'),
+        alert('4-result', fixture_id=4, event='result', outcome='push'),
+    ])
+    text, shown = board.render()
+    assert "⏳ Open (1)" in text
+    assert "🏁 Settled (3): 1 won, 1 lost, 1 pushed" in text
+    assert shown == {'1-regular', '2-regular', '3-regular', '4-regular'}
+
+def test_board_render_cuts_entries_past_the_message_limit():
+    board = board_for(FakeTelegram(), datetime(2026, 10, 17, 12))
+    board.add([alert(f"{fixture_id}-placed", fixture_id=fixture_id) for fixture_id in range(500)])
+    for fixture_id in range(500):
+        board.entries[f"{fixture_id}-regular"]['text'] = 'x' * 40
+    text, shown = board.render()
+    assert len(text) <= MESSAGE_LIMIT
+    assert text.endswith('more lines')
+    assert 0 < len(shown) < 500
+
+def test_board_is_sent_once_then_edited_and_marks_alerts_delivered():
+    telegram, delivered = FakeTelegram(), []
+    board = board_for(telegram, datetime(2026, 10, 17, 12), delivered=delivered)
+    board.add([alert('1-placed')])
+    assert board.refresh()
+    assert [method for method, _ in telegram.sent] == ['sendMessage', 'pinChatMessage']
+    assert delivered == ['1-placed']
+    # Same content: no edit
+    assert not board.refresh()
+    board.add([alert('1-result', event='result', outcome='win')])
+    assert board.refresh()
+    assert telegram.sent[-1][0] == 'editMessageText'
+    assert delivered == ['1-placed', '1-result']
+
+def test_board_rolls_over_at_midnight_carrying_open_bets():
+    telegram, boards = FakeTelegram(), {}
+    board = board_for(telegram, datetime(2026, 10, 17, 23, 59), boards=boards)
+    board.add([alert('1-placed', fixture_id=1), alert('2-result', fixture_id=2, event='result', outcome='win')])
+    board.refresh()
+    board._clock.now = datetime(2026, 10, 18, 0, 1)
+    board.refresh()
+    assert board.day == '2026-10-18'
+    assert list(board.entries) == ['1-regular']
+    # A new message for the new day, not an edit of yesterday's
+    assert [method for method, _ in telegram.sent].count('sendMessage') == 2
+    assert boards['2026-10-18']['message_id'] != boards['2026-10-17']['message_id']
+
+def test_digests_group_alerts_by_section():
+    digests = build_digests([
+        alert('1-result', fixture_id=1, event='result', outcome='loss'),
+        alert('2-placed', fixture_id=2),
+        alert('3-result', fixture_id=3, event='result', outcome='win'),
+        alert('4-result', fixture_id=4, event='result', outcome='push'),
+    ])
+    assert len(digests) == 1
+    text, keys = digests[0]
+    assert keys == ['2-placed', '3-result', '1-result', '4-result']
+    assert text.index('🎯 Bets placed (1)') < text.index('🎉 Wins (1)') < text.index('🔁 Losses (1)') < text.index('📣 Alerts (1)')
+
+def test_digests_respect_the_message_limit():
+    alerts = [dict(alert(f"{n}-placed", fixture_id=n), text='x' * 1000) for n in range(10)]
+    digests = build_digests(alerts)
+    assert len(digests) == 3
+    assert all(len(text) <= MESSAGE_LIMIT for text, _ in digests)
+    assert [key for _, keys in digests for key in keys] == [a['key'] for a in alerts]
+    assert digests[1][0].startswith('🎯 Bets placed (cont.)')
+
+def test_oversized_alert_is_truncated_to_fit():
+    digests = build_digests([dict(alert('1-placed'), text='x' * 10000)])
+    assert len(digests) == 1 and len(digests[0][0]) <= MESSAGE_LIMIT
+
+def test_digest_skips_alerts_already_queued():
+    telegram = FakeTelegram()
+    outbox = outbox_for(telegram)
+    outbox.submit('single', key='1-placed')
+    assert outbox.submit_digest([alert('1-placed'), alert('2-placed', fixture_id=2)]) == 1
+    assert outbox.drain(5)
+    assert 'alert 1-placed' not in telegram.sent[-1][1]['text']
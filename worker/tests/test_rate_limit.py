@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from rate_limit import TokenBucket, ApiRateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_token_bucket_refills_at_its_rate_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.wait_time() == 1
+    clock.now = 10
+    assert bucket.wait_time(2) == 0
+    assert bucket.try_acquire(2) and not bucket.try_acquire()
+
+def test_token_bucket_acquire_sleeps_or_gives_up_past_max_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.5, capacity=1, clock=clock)
+    assert bucket.acquire(sleep=clock.sleep) == 0
+    assert bucket.acquire(max_wait=1, sleep=clock.sleep) is None
+    assert clock.now == 0
+    assert bucket.acquire(max_wait=5, sleep=clock.sleep) == 2
+    assert clock.now == 2
+
+def test_limiter_follows_the_minute_headers():
+    clock = FakeClock()
+    limiter = ApiRateLimiter(requests_per_minute=30, max_wait=0, clock=clock, sleep=clock.sleep)
+    limiter.update(200, {'X-RateLimit-Limit': '10', 'X-RateLimit-Remaining': '1'})
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    assert limiter.skipped == 1
+
+def test_limiter_blocks_after_a_429_for_retry_after():
+    clock = FakeClock()
+    limiter = ApiRateLimiter(max_wait=5, clock=clock, sleep=clock.sleep)
+    limiter.update(429, {'Retry-After': '30'})
+    assert limiter.throttled == 1
+    assert not limiter.acquire()
+    clock.now = 27
+    # Within max_wait: waits out the block, then for a token
+    assert limiter.acquire()
+    assert clock.now >= 30
+
+def test_limiter_skips_once_the_daily_quota_is_used_up():
+    clock = FakeClock()
+    limiter = ApiRateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.update(200, {'x-ratelimit-requests-limit': '100', 'x-ratelimit-requests-remaining': '0'})
+    assert not limiter.acquire()
+
+def test_poll_interval_spreads_the_remaining_quota_until_midnight():
+    limiter = ApiRateLimiter()
+    now = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+    assert limiter.poll_interval(15, now=now) == 15
+    limiter.daily_remaining = 1440 # 12h left until the 00:00 UTC reset
+    assert limiter.poll_interval(15, now=now) == 30
+    assert limiter.poll_interval(15, requests_per_cycle=2, now=now) == 60
+    assert limiter.poll_interval(60, now=now) == 60
+    limiter.daily_remaining = 0
+    assert limiter.poll_interval(15, now=now) == 12 * 3600
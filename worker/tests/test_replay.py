@@ -0,0 +1,30 @@
+import json
+from replay import ReplayHttpClient, SimulatedClock
+
+def record(ts, url, body, params=None):
+    return {'ts': ts, 'url': url, 'params': params, 'status': 200, 'headers': {}, 'body': json.dumps(body)}
+
+def fixture(fixture_id, status):
+    return {'fixture': {'id': fixture_id, 'status': {'short': status}}}
+
+def test_fixture_lookups_see_the_latest_state_up_to_the_current_frame():
+    records = [
+        record(0, 'https://api/fixtures?live=all', {'response': [fixture(1, '2H')]}),
+        record(5, 'https://api/fixtures', {'response': [fixture(1, '2H')]}, {'ids': '1'}),
+        record(60, 'https://api/fixtures?live=all', {'response': []}),
+        record(65, 'https://api/fixtures', {'response': [fixture(1, 'FT')]}, {'ids': '1'}),
+    ]
+    http = ReplayHttpClient(records)
+    http.frame, http.frame_end = records[0], 60
+    assert http.get('https://api/fixtures?live=all').json()['response'][0]['fixture']['id'] == 1
+    assert http.get('https://api/fixtures', params={'ids': '1-2'}).json()['response'][0]['fixture']['status']['short'] == '2H'
+    http.frame, http.frame_end = records[2], float('inf')
+    assert http.get('https://api/fixtures', params={'ids': '1'}).json()['response'][0]['fixture']['status']['short'] == 'FT'
+    assert http.post('https://api.telegram.org/botx/sendMessage').json()['ok']
+    assert http.stats() == {'api': {'/fixtures': 3}, 'telegram': {'sendMessage': 1}}
+
+def test_simulated_clock_only_moves_forward():
+    clock = SimulatedClock(100)
+    clock.sleep(5)
+    clock.advance_to(50)
+    assert clock.time() == 105
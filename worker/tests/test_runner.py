@@ -0,0 +1,62 @@
+from runner import FixedRateRunner, OVERRUN_SKIP
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.starts = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def make_runner(clock, duration, interval, **kwargs):
+    def cycle():
+        clock.starts.append(clock.now)
+        clock.now += duration
+    return FixedRateRunner(cycle, lambda: interval, clock=clock, sleep=clock.sleep, **kwargs)
+
+def test_cadence_does_not_drift_with_cycle_duration():
+    clock = FakeClock()
+    runner = make_runner(clock, duration=4, interval=15)
+    for _ in range(4):
+        runner.run_once()
+    assert clock.starts == [0, 15, 30, 45]
+    assert runner.overruns == 0 and runner.max_lag == 0
+
+def test_overrun_merges_the_late_slot_and_counts_swallowed_slots():
+    clock = FakeClock()
+    runner = make_runner(clock, duration=35, interval=15)
+    runner.run_once()
+    runner.run_once()
+    # 35s cycle swallows the 15s slot, the 30s slot runs late at 35s
+    assert clock.starts == [0, 35]
+    assert runner.overruns == 2
+    assert runner.skipped_slots == 2
+    assert runner.last_lag == 5
+
+def test_overrun_skip_policy_waits_for_the_next_slot():
+    clock = FakeClock()
+    runner = make_runner(clock, duration=20, interval=15, overrun_policy=OVERRUN_SKIP)
+    runner.run_once()
+    runner.run_once()
+    assert clock.starts == [0, 30]
+    assert runner.skipped_slots == 2
+
+def test_exact_wakeups_are_measured_from_the_end_of_the_cycle():
+    clock = FakeClock()
+    runner = make_runner(clock, duration=2, interval=300, wakeup_fn=lambda: 1)
+    for _ in range(4):
+        runner.run_once()
+    # A 1s wake-up after a 2s cycle is neither early nor an overrun of the 300s cadence
+    assert clock.starts == [0, 3, 6, 9]
+    assert runner.overruns == 0 and runner.skipped_slots == 0
+    assert runner.max_lag == 0
+
+def test_wakeup_never_delays_the_cadence():
+    clock = FakeClock()
+    runner = make_runner(clock, duration=1, interval=15, wakeup_fn=lambda: 60)
+    runner.run_once()
+    runner.run_once()
+    assert clock.starts == [0, 15]
@@ -0,0 +1,103 @@
+from scheduler import MatchClock, PollScheduler, FAST_POLL_INTERVAL, IDLE_POLL_INTERVAL, MAX_POLL_INTERVAL
+
+KICKOFF = 1_000_000
+WINDOWS = [('1H', [35, 36, 37])]
+
+def live(fixture_id, status, elapsed, first=None, second=None):
+    return {'fixture': {
+        'id': fixture_id,
+        'status': {'short': status, 'elapsed': elapsed},
+        'periods': {'first': first, 'second': second},
+    }}
+
+def scheduler_at(now):
+    clock = {'now': now}
+    scheduler = PollScheduler(WINDOWS, clock=lambda: clock['now'])
+    return scheduler, clock
+
+def test_cadence_and_wakeup_split():
+    scheduler, clock = scheduler_at(KICKOFF + 30 * 60)
+    assert scheduler.next_interval() == IDLE_POLL_INTERVAL
+    assert scheduler.next_wakeup() is None
+
+    # 30' with a known kickoff: the window opens in exactly 5 minutes
+    scheduler.observe([live(1, '1H', 30, first=KICKOFF)])
+    assert scheduler.next_interval() == MAX_POLL_INTERVAL
+    assert scheduler.next_wakeup() == 5 * 60
+
+    clock['now'] = KICKOFF + 35 * 60
+    assert scheduler.next_interval() == FAST_POLL_INTERVAL
+    assert scheduler.next_wakeup() is None
+
+def test_nothing_coming_up_polls_at_the_slowest_cadence():
+    scheduler, _ = scheduler_at(KICKOFF + 60 * 60)
+    scheduler.observe([live(1, '2H', 60, first=KICKOFF, second=KICKOFF + 60 * 60)])
+    assert scheduler.next_interval() == MAX_POLL_INTERVAL
+    assert scheduler.next_wakeup() is None
+
+def test_fast_polling_while_any_fixture_is_inside_a_window():
+    scheduler, _ = scheduler_at(KICKOFF + 36 * 60)
+    scheduler.observe([
+        live(1, '1H', 10, first=KICKOFF + 26 * 60),
+        live(2, '1H', 36, first=KICKOFF),
+    ])
+    assert scheduler.next_interval() == FAST_POLL_INTERVAL
+
+def test_fixture_past_every_window_is_ignored():
+    scheduler, _ = scheduler_at(KICKOFF + 40 * 60)
+    scheduler.observe([live(1, '1H', 40, first=KICKOFF)])
+    assert scheduler.next_interval() == MAX_POLL_INTERVAL
+    assert scheduler.next_wakeup() is None
+
+def test_pending_ht_bet_wakes_up_for_half_time():
+    scheduler, clock = scheduler_at(KICKOFF + 40 * 60)
+    scheduler.observe([live(1, '1H', 40, first=KICKOFF)], pending_fixture_ids=[1])
+    assert scheduler.next_wakeup() == 5 * 60
+    clock['now'] = KICKOFF + 47 * 60
+    scheduler.observe([live(1, 'HT', 45, first=KICKOFF)], pending_fixture_ids=[1])
+    assert scheduler.next_interval() == FAST_POLL_INTERVAL
+    # Without a pending bet nothing happens at HT
+    scheduler.observe([live(1, 'HT', 45, first=KICKOFF)])
+    assert scheduler.next_interval() == MAX_POLL_INTERVAL
+
+def test_wakeup_is_capped_at_the_slowest_interval():
+    scheduler, _ = scheduler_at(KICKOFF + 60)
+    scheduler.observe([live(1, '1H', 1, first=KICKOFF)])
+    assert scheduler.next_wakeup() == MAX_POLL_INTERVAL
+
+def test_minute_from_the_kickoff_timestamp():
+    clock = MatchClock()
+    clock.update('1H', 30, {'first': KICKOFF}, KICKOFF + 30 * 60 + 10)
+    assert clock.minute_at(KICKOFF + 35 * 60 + 1) == 35
+    assert clock.time_of_minute(35) == KICKOFF + 35 * 60
+
+def test_feed_running_ahead_of_the_wall_clock_is_calibrated_early():
+    clock = MatchClock()
+    clock.update('1H', 31, {'first': KICKOFF}, KICKOFF + 30 * 60 + 10)
+    assert clock.offset == 1
+    assert clock.time_of_minute(35) == KICKOFF + 34 * 60
+    # The largest offset seen is kept
+    clock.update('1H', 32, {'first': KICKOFF}, KICKOFF + 32 * 60 + 10)
+    assert clock.offset == 1
+
+def test_second_half_counts_from_its_own_kickoff():
+    clock = MatchClock()
+    second = KICKOFF + 62 * 60
+    clock.update('2H', 50, {'first': KICKOFF, 'second': second}, second + 5 * 60)
+    assert clock.minute_at(second + 35 * 60) == 80
+    assert clock.time_of_minute(80) == second + 35 * 60
+
+def test_without_kickoff_the_last_elapsed_is_extrapolated():
+    clock = MatchClock()
+    observed = KICKOFF + 3600
+    clock.update('1H', 30, {}, observed)
+    assert clock.minute_at(observed + 2 * 60) == 32
+    # The 30th minute may have started up to 59s before it was seen
+    assert clock.time_of_minute(35) == observed + 4 * 60
+
+def test_clock_stops_outside_running_periods():
+    clock = MatchClock()
+    clock.update('HT', 45, {'first': KICKOFF}, KICKOFF + 50 * 60)
+    assert not clock.running
+    assert clock.minute_at(KICKOFF + 60 * 60) == 45
+    assert clock.time_of_minute(46) is None
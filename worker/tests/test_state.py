@@ -0,0 +1,133 @@
+from datetime import datetime
+from state import StateManager
+from conftest import RecordingBackend
+from storage import MemoryBackend
+
+NOW = datetime(2026, 10, 17, 12)
+
+def notification(key):
+    return {'key': key, 'text': f"alert {key}", 'fixture_id': 1, 'bet_type': 'regular', 'event': 'placed'}
+
+def committed_writes(backend, collection, doc_id):
+    return [write for batch in backend.batches for (key, write) in batch if key == (collection, doc_id)]
+
+def test_set_then_merge_coalesces_into_one_set(backend):
+    state = StateManager(backend, clock=lambda: NOW)
+    state.begin_cycle()
+    state._write('tracked_matches', 1, {'a': 1, 'b': 1})
+    state._write('tracked_matches', 1, {'b': 2, 'c': 3}, merge=True)
+    assert state.get_tracked_match(1) == {'a': 1, 'b': 2, 'c': 3}
+    assert backend.batches == []
+    state.flush_writes()
+    assert committed_writes(backend, 'tracked_matches', '1') == [{'data': {'a': 1, 'b': 2, 'c': 3}, 'merge': False}]
+    assert backend.get('tracked_matches', '1') == {'a': 1, 'b': 2, 'c': 3}
+
+def test_set_then_delete_coalesces_into_one_delete(backend):
+    backend.inner.commit([(('tracked_matches', '1'), {'data': {'old': True}, 'merge': False})])
+    state = StateManager(backend, clock=lambda: NOW)
+    state.begin_cycle()
+    state._write('tracked_matches', 1, {'a': 1})
+    state.delete_tracked_match(1)
+    assert state.get_tracked_match(1) is None
+    state.flush_writes()
+    assert committed_writes(backend, 'tracked_matches', '1') == [{'data': None, 'merge': False}]
+    assert backend.get('tracked_matches', '1') is None
+
+def test_merge_after_delete_becomes_a_plain_set(backend):
+    backend.inner.commit([(('tracked_matches', '1'), {'data': {'old': True}, 'merge': False})])
+    state = StateManager(backend, clock=lambda: NOW)
+    state.begin_cycle()
+    state.delete_tracked_match(1)
+    state.update_tracked_match(1, {'a': 1})
+    state.flush_writes()
+    assert backend.get('tracked_matches', '1') == {'a': 1}
+
+def test_grouped_unit_is_never_split_across_batches():
+    backend = RecordingBackend(MemoryBackend(), batch_limit=5)
+    state = StateManager(backend, clock=lambda: NOW)
+    state.begin_cycle()
+    for fixture_id in range(1, 8):
+        state.update_tracked_match(fixture_id * 100, {'seen': True})
+        state.add_unresolved_bet(fixture_id, {'bet_type': 'regular'}, notification=notification(f"{fixture_id}-placed"))
+    state.flush_writes()
+    assert len(backend.batches) > 1
+    assert all(len(batch) <= 5 for batch in backend.batches)
+    for fixture_id in range(1, 8):
+        bet_batch = [i for i, batch in enumerate(backend.batches) if (('unresolved_bets', str(fixture_id)) in [key for key, _ in batch])]
+        outbox_batch = [i for i, batch in enumerate(backend.batches) if (('notification_outbox', f"{fixture_id}-placed") in [key for key, _ in batch])]
+        assert bet_batch == outbox_batch and len(bet_batch) == 1
+
+def test_failed_batch_stays_buffered_and_is_retried(backend):
+    state = StateManager(backend, clock=lambda: NOW)
+    state.begin_cycle()
+    state.add_unresolved_bet(1, {'bet_type': 'regular'}, notification=notification('1-placed'))
+    backend.fail_commits = 1
+    assert state.flush_writes() == 0
+    # Not committed, so not handed to the sender either
+    assert state.take_committed_notifications() == []
+    assert backend.get('unresolved_bets', '1') is None
+
+    state.begin_cycle()
+    assert state.get_unresolved_bet(1)['bet_type'] == 'regular'
+    assert state.flush_writes() == 2
+    assert backend.get('unresolved_bets', '1')['bet_type'] == 'regular'
+    assert [entry['key'] for entry in state.take_committed_notifications()] == ['1-placed']
+
+def test_duplicate_outbox_key_is_suppressed(backend):
+    state = StateManager(backend, clock=lambda: NOW)
+    state.add_unresolved_bet(1, {'bet_type': 'regular'}, notification=notification('1-placed'))
+    assert [entry['key'] for entry in state.take_committed_notifications()] == ['1-placed']
+    state.mark_notification_delivered('1-placed')
+
+    # The same alert re-produced, e.g. after a restart
+    state.begin_cycle()
+    state.add_unresolved_bet(1, {'bet_type': 'regular', 'again': True}, notification=notification('1-placed'))
+    state.flush_writes()
+    assert state.take_committed_notifications() == []
+    assert backend.get('notification_outbox', '1-placed')['delivered'] is True
+    assert backend.get('unresolved_bets', '1')['again'] is True
+
+def test_placed_at_is_a_native_utc_timestamp():
+    backend = MemoryBackend()
+    state = StateManager(backend, clock=lambda: NOW)
+    state.add_unresolved_bet(1, {'bet_type': '80_minute'})
+    placed_at = backend.get('unresolved_bets', '1')['placed_at']
+    assert placed_at.tzinfo is not None and placed_at.replace(tzinfo=None) == NOW
+
+def test_resolving_outside_a_cycle_commits_each_bet_as_one_unit():
+    backend = RecordingBackend(MemoryBackend(), batch_limit=4)
+    state = StateManager(backend, clock=lambda: NOW)
+    for fixture_id in (1, 2, 3):
+        backend.inner.commit([(('unresolved_bets', str(fixture_id)), {'data': {'bet_type': 'regular'}, 'merge': False})])
+    assert state.move_many_to_resolved([
+        (fixture_id, {'bet_type': 'regular'}, 'win', notification(f"{fixture_id}-result")) for fixture_id in (1, 2, 3)
+    ])
+    # Three 3-write units, at most 4 writes per batch: one batch per unit
+    assert [len(batch) for batch in backend.batches] == [3, 3, 3]
+    for fixture_id in (1, 2, 3):
+        assert backend.get('unresolved_bets', str(fixture_id)) is None
+        assert backend.get('resolved_bets', str(fixture_id))['outcome'] == 'win'
+        assert backend.get('notification_outbox', f"{fixture_id}-result")['delivered'] is False
+
+def test_resolving_during_a_cycle_is_buffered_until_the_flush(backend):
+    backend.inner.commit([(('unresolved_bets', '1'), {'data': {'bet_type': 'regular'}, 'merge': False})])
+    state = StateManager(backend, clock=lambda: NOW)
+    state.begin_cycle()
+    assert state.get_unresolved_bet(1) is not None
+    state.move_to_resolved(1, {'bet_type': 'regular'}, 'loss')
+    assert state.get_unresolved_bet(1) is None
+    assert backend.batches == []
+    state.flush_writes()
+    assert backend.get('resolved_bets', '1')['outcome'] == 'loss'
+    assert backend.get('unresolved_bets', '1') is None
+
+def test_flush_packs_independent_writes_into_full_batches():
+    backend = RecordingBackend(MemoryBackend(), batch_limit=5)
+    state = StateManager(backend, clock=lambda: NOW)
+    state.begin_cycle()
+    for fixture_id in range(12):
+        state.update_tracked_match(fixture_id, {'seen': True})
+    assert state.flush_writes() == 12
+    assert [len(batch) for batch in backend.batches] == [5, 5, 2]
+    # Nothing left buffered
+    assert state.flush_writes() == 0
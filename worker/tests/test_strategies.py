@@ -0,0 +1,109 @@
+from datetime import datetime
+from backtest import Backtest, Timelines
+from columns import FixtureColumns
+from conftest import RecordingBackend
+from state import StateManager
+from storage import MemoryBackend
+from strategies import StrategyEngine, enabled_strategies
+
+def match(fixture_id, status, elapsed, home, away):
+    return {
+        'fixture': {'id': fixture_id, 'status': {'short': status, 'elapsed': elapsed}},
+        'league': {'id': 39, 'name': 'Premier League', 'country': 'England'},
+        'teams': {'home': {'name': 'A'}, 'away': {'name': 'B'}},
+        'goals': {'home': home, 'away': away},
+    }
+
+def timelines(timeline):
+    return Timelines.from_records([{
+        'fixture_id': 1, 'league_id': 39, 'league': 'Premier League', 'country': 'England',
+        'home': 'A', 'away': 'B', 'timeline': timeline,
+    }])
+
+def test_unchanged_fixture_is_skipped():
+    backtest = Backtest(enabled_strategies('regular'))
+    backtest.run(timelines([['1H', 36, 1, 1], ['1H', 36, 1, 1], ['HT', 45, 1, 1]]))
+    # The repeated 36' poll is not evaluated again
+    assert backtest.evaluated == 2
+    assert [entry['key'] for entry in backtest.notifications] == ['1-regular-placed', '1-regular-result']
+
+def test_ht_bet_is_settled_after_the_index_failed_to_load_at_ht():
+    backtest = Backtest(enabled_strategies('regular'))
+    backend = RecordingBackend(backtest.state_manager.backend)
+    backtest.state_manager.backend = backend
+
+    def fail_at_ht():
+        # Cycles 1-2 load the index normally, the first HT cycle cannot read it
+        backend.fail_streams = 1 if backtest.cycles == 2 else 0
+
+    cycle = backtest.cycle
+    def flaky_cycle(*args):
+        fail_at_ht()
+        cycle(*args)
+    backtest.cycle = flaky_cycle
+
+    report = backtest.run(timelines([['1H', 35, 1, 1], ['1H', 36, 1, 1], ['HT', 45, 1, 1], ['HT', 45, 1, 1], ['2H', 46, 1, 1]]))
+    assert report['strategies']['regular']['win'] == 1
+    assert report['strategies']['regular']['open'] == 0
+
+def test_legacy_plain_id_ft_bet_is_settled():
+    backend = MemoryBackend()
+    backend.commit([(('unresolved_bets', '77'), {'data': {
+        'bet_type': '80_minute', 'fixture_id': 77, '80_score': '2-0', 'match_name': 'A vs B',
+        'placed_at': datetime(2026, 10, 17, 12),
+    }, 'merge': False})])
+    state = StateManager(backend)
+    engine = StrategyEngine(state, enabled_strategies('regular'))
+    state.begin_cycle()
+    engine.process(match(77, 'FT', 90, 2, 0))
+    state.flush_writes()
+    assert backend.get('unresolved_bets', '77') is None
+    assert backend.get('resolved_bets', '77')['outcome'] == 'win'
+
+def test_each_strategy_keeps_its_own_bet_on_one_fixture():
+    backend = MemoryBackend()
+    state = StateManager(backend)
+    engine = StrategyEngine(state, enabled_strategies('regular,80_minute'))
+    for status, elapsed, home, away in [('1H', 36, 1, 1), ('HT', 45, 1, 1), ('2H', 80, 2, 0)]:
+        state.begin_cycle()
+        engine.process(match(5, status, elapsed, home, away))
+        state.flush_writes()
+    assert backend.get('resolved_bets', '5')['outcome'] == 'win'
+    assert backend.get('unresolved_bets', '5-80_minute')['80_score'] == '2-0'
+
+    state.begin_cycle()
+    engine.process(match(5, 'FT', 90, 2, 1))
+    state.flush_writes()
+    assert backend.get('unresolved_bets', '5-80_minute') is None
+    assert backend.get('resolved_bets', '5-80_minute')['outcome'] == 'loss'
+    assert backend.get('tracked_matches', '5') is None
+
+def columns(*matches):
+    return FixtureColumns.from_matches(list(matches))
+
+def test_diff_snapshot_reports_each_kind_of_change():
+    engine = StrategyEngine(StateManager(MemoryBackend()), enabled_strategies('regular'))
+    changed, deltas = engine.diff_snapshot(columns(match(1, '1H', 10, 0, 0), match(2, '1H', 20, 0, 0)))
+    assert changed.tolist() == [True, True] and deltas['new'] == 2
+    engine.commit_snapshot()
+
+    changed, deltas = engine.diff_snapshot(columns(
+        match(1, '1H', 10, 0, 0), match(2, '1H', 21, 0, 0), match(3, '1H', 5, 0, 0),
+        match(4, 'HT', 45, 1, 0),
+    ))
+    assert changed.tolist() == [False, True, True, True]
+    assert deltas == {'new': 2, 'status': 0, 'goals': 0, 'minute': 1}
+    engine.commit_snapshot()
+
+    changed, deltas = engine.diff_snapshot(columns(match(2, '1H', 21, 1, 0), match(4, '2H', 46, 1, 0)))
+    assert changed.tolist() == [True, True]
+    assert deltas == {'new': 0, 'status': 1, 'goals': 1, 'minute': 0}
+
+def test_snapshot_is_only_replaced_on_commit():
+    engine = StrategyEngine(StateManager(MemoryBackend()), enabled_strategies('regular'))
+    engine.diff_snapshot(columns(match(1, '1H', 10, 0, 0)))
+    engine.commit_snapshot()
+    # A cycle that did not commit is evaluated again in full by the next one
+    engine.diff_snapshot(columns(match(1, '1H', 11, 0, 0)))
+    changed, deltas = engine.diff_snapshot(columns(match(1, '1H', 11, 0, 0)))
+    assert changed.tolist() == [True] and deltas['minute'] == 1